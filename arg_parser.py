@@ -1,9 +1,13 @@
 import argparse
 from typing import Any, Optional, Tuple, Dict
 
-import sounddevice as sd  
+# Smallest block size accepted on the command line, in frames
+MIN_BLOCKSIZE = 64
 
 def get_devices(hostapi: str = None):
+    # Imported here so the offline modes run without PortAudio installed
+    import sounddevice as sd
+
     res = []
     query =  enumerate(sd.query_devices())
     for idx, item in query:
@@ -42,6 +46,8 @@ def select_device(idx: Optional[int] = None, kind: str = 'input') -> Tuple[int,
     Returns:
         Tuple[int, int, int]: The device index, channel count, and sample rate.
     """
+    import sounddevice as sd
+
     if idx is None:
         list_devices(kind)
         idx = int(input(f"Select {kind} device index: host:API "))
@@ -63,11 +69,11 @@ def get_config() -> argparse.Namespace:
     parser.add_argument('--output_device', type=int, default=None,
                         help='Output device index (default: prompt)')
     parser.add_argument('--wav_path', type=str, default=None,
-                        help='Path to WAV file for playback mode')
+                        help='Path to WAV file for playback and render modes, or a directory or glob pattern for batch mode')
     parser.add_argument('--list_devices', action='store_true',
                         help='List available audio devices and exit')
-    parser.add_argument('--mode', type=str, choices=['playback', 'record', 'passthrough'],
-                        default='passthrough', help="Operation mode: playback, record, or passthrough (default: passthrough)")
+    parser.add_argument('--mode', type=str, choices=['playback', 'record', 'passthrough', 'latency', 'render', 'batch'],
+                        default='passthrough', help="Operation mode: playback, record, passthrough, latency, render, or batch (default: passthrough)")
     parser.add_argument('--log_level', type=str, default='INFO',
                         help='Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)')
     parser.add_argument("--save_recording", action="store_true", help="Save recording in passthrough mode")
@@ -75,8 +81,33 @@ def get_config() -> argparse.Namespace:
                         help='Number of channels to use for input (default: device max)')
     parser.add_argument('--out_ch', type=int, default=None,
                         help='Number of channels to use for output (default: device max)')
+    parser.add_argument('--blocksize', type=int, default=None,
+                        help=f'Frames per audio callback, at least {MIN_BLOCKSIZE} (default: 4096)')
+    parser.add_argument('--trials', type=int, default=10,
+                        help='Number of test bursts played in latency mode (default: 10)')
+    parser.add_argument('--output_path', type=str, default=None,
+                        help='Output WAV path for render mode, or output directory for batch mode '
+                             '(default: next to the input, name with _rendered)')
+    parser.add_argument('--settings', type=str, default=None,
+                        help='JSON file of plugin settings applied in render and batch modes')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Worker processes for batch mode (default: one per available core)')
+    parser.add_argument('--profile', action='store_true',
+                        help='Time the audio callbacks and plugins, shown live and summarized at exit')
     args = parser.parse_args()
 
+    if args.blocksize is not None and args.blocksize < MIN_BLOCKSIZE:
+        parser.error(f"--blocksize must be at least {MIN_BLOCKSIZE}")
+
+    if args.trials < 1:
+        parser.error("--trials must be at least 1")
+
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    if args.mode in ('render', 'batch') and args.wav_path is None:
+        parser.error(f"--wav_path is required in {args.mode} mode (a directory or glob pattern in batch mode)")
+
     if args.list_devices:
         list_devices('input',0)
         list_devices('output',0)
@@ -89,9 +120,9 @@ def get_config() -> argparse.Namespace:
     out_ch: int | None = None
     sr: int | None = None
 
-    if args.mode in ('record', 'passthrough'):
+    if args.mode in ('record', 'passthrough', 'latency'):
         in_idx, in_ch, sr = select_device(args.input_device, 'input')
-    if args.mode in ('playback', 'passthrough'):
+    if args.mode in ('playback', 'passthrough', 'latency'):
         out_idx, out_ch, sr = select_device(args.output_device, 'output')
 
     args.in_idx = in_idx
@@ -0,0 +1,247 @@
+import math
+from multiprocessing import shared_memory
+from time import perf_counter_ns
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from message_bus import CHAIN_PLUGINS
+
+# Timed stages: the whole callback, then each chain plugin
+STAGES: List[str] = ["callback"] + list(CHAIN_PLUGINS)
+CALLBACK_STAGE = 0
+
+# Stage time histogram, log spaced from 1 us with this many bins per octave
+TIME_BINS = 160
+BINS_PER_OCTAVE = 8
+# DSP load histogram, in steps of LOAD_STEP percent of the block duration
+LOAD_BINS = 100
+LOAD_STEP = 2
+
+# Stream status flags counted as xruns, as named on sounddevice.CallbackFlags
+XRUN_FLAGS = ("input_underflow", "input_overflow", "output_underflow", "output_overflow")
+
+# Counter slots, int64 each
+BLOCKS = 0
+DEADLINE_MISSES = 1
+MAX_LOAD_PPM = 2
+SAMPLERATE = 3
+FIRST_XRUN = 4
+COUNTER_SLOTS = FIRST_XRUN + len(XRUN_FLAGS)
+
+
+class DSPProfiler:
+    """
+    Callback and per-plugin timing collected on the audio thread, readable
+    live from the visualizer process.
+
+    Every measurement lands in preallocated int64 histograms in shared
+    memory: one log-spaced time histogram and maximum per stage, one histogram
+    of DSP load (callback time over block duration), and counters for blocks,
+    missed deadlines and xrun status flags. Recording is a couple of
+    perf_counter_ns() calls and integer increments, with no array allocation.
+    The audio thread is the only writer; readers may see a histogram one
+    block out of date, which is fine for statistics.
+    """
+
+    def __init__(self, name: Optional[str] = None) -> None:
+        """
+        Create a new zeroed profiler, or attach to an existing one.
+
+        Parameters:
+            name (Optional[str]): Name of an existing profiler to attach to.
+                A new one is created if None.
+        """
+        stages = len(STAGES)
+        slots = stages * TIME_BINS + stages + LOAD_BINS + COUNTER_SLOTS
+        size = slots * 8
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+            self.shm.buf[:size] = bytes(size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+
+        offset = 0
+        self.stage_hist = np.ndarray((stages, TIME_BINS), dtype=np.int64, buffer=self.shm.buf, offset=offset)
+        offset += stages * TIME_BINS * 8
+        self.stage_max = np.ndarray((stages,), dtype=np.int64, buffer=self.shm.buf, offset=offset)
+        offset += stages * 8
+        self.load_hist = np.ndarray((LOAD_BINS,), dtype=np.int64, buffer=self.shm.buf, offset=offset)
+        offset += LOAD_BINS * 8
+        self.counters = np.ndarray((COUNTER_SLOTS,), dtype=np.int64, buffer=self.shm.buf, offset=offset)
+
+    def __getstate__(self):
+        # The visualizer process attaches to the same segment by name
+        return {"name": self.shm.name}
+
+    def __setstate__(self, state) -> None:
+        self.__init__(state["name"])
+
+    def set_samplerate(self, samplerate: int) -> None:
+        """
+        Set the stream sample rate used to turn block sizes into deadlines.
+
+        Parameters:
+            samplerate (int): The stream sample rate.
+        """
+        self.counters[SAMPLERATE] = samplerate
+
+    @staticmethod
+    def stage_slot(name: str) -> int:
+        """
+        Return the histogram row of a stage.
+
+        Parameters:
+            name (str): "callback" or a plugin key from CHAIN_PLUGINS.
+
+        Returns:
+            int: The stage's row.
+        """
+        return STAGES.index(name)
+
+    def record_stage(self, slot: int, elapsed_ns: int) -> None:
+        """
+        Record the run time of one stage.
+
+        Parameters:
+            slot (int): The stage's row, from stage_slot().
+            elapsed_ns (int): Run time in nanoseconds.
+        """
+        index = 0
+        if elapsed_ns > 1000:
+            index = min(int(math.log2(elapsed_ns / 1000) * BINS_PER_OCTAVE), TIME_BINS - 1)
+        self.stage_hist[slot, index] += 1
+        if elapsed_ns > self.stage_max[slot]:
+            self.stage_max[slot] = elapsed_ns
+
+    def record_status(self, status: Any) -> None:
+        """
+        Count the xrun flags set in a stream callback status.
+
+        Parameters:
+            status (sounddevice.CallbackFlags): The status passed to the callback.
+        """
+        if not status:
+            return
+        for index, flag in enumerate(XRUN_FLAGS):
+            if getattr(status, flag, False):
+                self.counters[FIRST_XRUN + index] += 1
+
+    def record_block(self, start_ns: int, frames: int, status: Any) -> None:
+        """
+        Record a finished callback. Call as the last thing in the callback.
+
+        Parameters:
+            start_ns (int): perf_counter_ns() taken when the callback started.
+            frames (int): Frames in the block.
+            status (sounddevice.CallbackFlags): The status passed to the callback.
+        """
+        elapsed_ns = perf_counter_ns() - start_ns
+        self.record_stage(CALLBACK_STAGE, elapsed_ns)
+        self.record_status(status)
+        self.counters[BLOCKS] += 1
+        samplerate = self.counters[SAMPLERATE]
+        if frames <= 0 or samplerate <= 0:
+            return
+        # Share of the block's duration spent in the callback, in parts per million
+        load_ppm = elapsed_ns * samplerate // (frames * 1000)
+        self.load_hist[min(load_ppm // (LOAD_STEP * 10000), LOAD_BINS - 1)] += 1
+        if load_ppm >= 1000000:
+            self.counters[DEADLINE_MISSES] += 1
+        if load_ppm > self.counters[MAX_LOAD_PPM]:
+            self.counters[MAX_LOAD_PPM] = load_ppm
+
+    @staticmethod
+    def _percentile(hist: np.ndarray, q: float) -> int:
+        # Index of the bin holding the q-th percentile, -1 if empty
+        total = hist.sum()
+        if total == 0:
+            return -1
+        return int(np.searchsorted(np.cumsum(hist), q / 100 * total))
+
+    def load_percentile(self, q: float) -> float:
+        """
+        Return an upper bound on the q-th percentile DSP load.
+
+        Parameters:
+            q (float): Percentile, 0 to 100.
+
+        Returns:
+            float: Load as a fraction of the block duration, 0.0 if nothing was recorded.
+        """
+        index = self._percentile(self.load_hist, q)
+        if index < 0:
+            return 0.0
+        # A bin's upper edge, but never beyond the largest load seen
+        return min((index + 1) * LOAD_STEP / 100, self.counters[MAX_LOAD_PPM] / 1e6)
+
+    def stage_percentile(self, slot: int, q: float) -> float:
+        """
+        Return an upper bound on the q-th percentile run time of a stage.
+
+        Parameters:
+            slot (int): The stage's row, from stage_slot().
+            q (float): Percentile, 0 to 100.
+
+        Returns:
+            float: Run time in microseconds, 0.0 if the stage never ran.
+        """
+        index = self._percentile(self.stage_hist[slot], q)
+        if index < 0:
+            return 0.0
+        return min(2.0 ** ((index + 1) / BINS_PER_OCTAVE), self.stage_max[slot] / 1000)
+
+    def xruns(self) -> Dict[str, int]:
+        """
+        Return how many callbacks reported each xrun flag.
+
+        Returns:
+            Dict[str, int]: Counts by flag name.
+        """
+        return {flag: int(self.counters[FIRST_XRUN + index]) for index, flag in enumerate(XRUN_FLAGS)}
+
+    def load_line(self) -> str:
+        """
+        Return a one-line DSP load summary, as shown live in the GUI.
+
+        Returns:
+            str: The summary.
+        """
+        blocks = int(self.counters[BLOCKS])
+        if blocks == 0:
+            return "DSP load: -"
+        return (
+            f"DSP load: p50 {self.load_percentile(50) * 100:.0f}% "
+            f"p99 {self.load_percentile(99) * 100:.0f}% "
+            f"max {self.counters[MAX_LOAD_PPM] / 10000:.0f}%, "
+            f"{self.counters[DEADLINE_MISSES]} late, {sum(self.xruns().values())} xruns"
+        )
+
+    def summary(self) -> List[str]:
+        """
+        Return the full report, one line per entry, as logged at shutdown.
+
+        Returns:
+            List[str]: Load, per-stage percentiles and xrun counts.
+        """
+        lines = [f"{self.load_line()} over {int(self.counters[BLOCKS])} blocks"]
+        for slot, name in enumerate(STAGES):
+            if self.stage_hist[slot].sum() == 0:
+                continue
+            lines.append(
+                f"{name}: p50 {self.stage_percentile(slot, 50):.0f} us, "
+                f"p99 {self.stage_percentile(slot, 99):.0f} us, "
+                f"max {self.stage_max[slot] / 1000:.0f} us"
+            )
+        lines.append("Xruns: " + ", ".join(f"{flag} {count}" for flag, count in self.xruns().items()))
+        return lines
+
+    def close(self) -> None:
+        """
+        Detach from the shared memory, and free it if this process created it.
+        """
+        del self.stage_hist, self.stage_max, self.load_hist, self.counters
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
@@ -1,9 +1,11 @@
 import logging
+import os
+import struct
 from pathlib import Path
-from typing import List
+from typing import List, Optional, Tuple
 
 import numpy as np
-from scipy.io.wavfile import write
+from scipy.io.wavfile import read, write
 
 def save_recording(sr: int, recorded_frames: List[np.ndarray]) -> None:
     """
@@ -41,4 +43,195 @@ def save_recording(sr: int, recorded_frames: List[np.ndarray]) -> None:
     audio = np.concatenate(recorded_frames, axis=0)
     audio_int16 = np.int16(audio * 32767)
     write(filename, sr, audio_int16)
-    logging.info(f"Saved recording to {filename}")
\ No newline at end of file
+    logging.info(f"Saved recording to {filename}")
+
+def load_wav(wav_path: str, channels: Optional[int] = None) -> Tuple[int, np.ndarray]:
+    """
+    Load a WAV file as float32 frames in the range [-1, 1].
+
+    Parameters:
+        wav_path (str): Path to the WAV file.
+        channels (Optional[int]): Pad with silent channels or truncate to this
+            many channels. Keeps the file's channel count if None.
+
+    Returns:
+        Tuple[int, np.ndarray]: The sample rate and audio data (frames, channels).
+    """
+    wav_sr, data = read(wav_path)
+    if data.dtype != np.float32:
+        # Convert to float32 in range [-1, 1]
+        if np.issubdtype(data.dtype, np.integer):
+            max_val = np.iinfo(data.dtype).max
+            data = data.astype(np.float32) / max_val
+        else:
+            data = data.astype(np.float32)
+    if data.ndim == 1:
+        data = data[:, np.newaxis]
+    if channels is not None:
+        if data.shape[1] < channels:
+            # Pad with zeros for missing channels
+            data = np.pad(data, ((0, 0), (0, channels - data.shape[1])))
+        elif data.shape[1] > channels:
+            data = data[:, :channels]
+    return wav_sr, data
+
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+class WavSource:
+    """
+    Streaming reader for WAV files that never loads the whole file.
+
+    Only the RIFF header is parsed up front. The data chunk is memory-mapped
+    and read_into() converts one block at a time to float32, the same way
+    load_wav converts a whole file, padding or truncating channels on the
+    way. The operating system pages samples in as blocks are read, so
+    opening a multi-hour file is instant, memory use stays flat and seeking
+    is just moving `position`.
+
+    Supports little-endian PCM with 8, 16, 24 or 32 bits and 32 or 64-bit
+    float, including WAVE_FORMAT_EXTENSIBLE headers.
+    """
+
+    def __init__(self, wav_path: str, channels: Optional[int] = None) -> None:
+        """
+        Parameters:
+            wav_path (str): Path to the WAV file.
+            channels (Optional[int]): Pad with silent channels or truncate to
+                this many channels. Keeps the file's channel count if None.
+        """
+        self.wav_path = wav_path
+        with open(wav_path, "rb") as fh:
+            format_tag, file_channels, samplerate, bits, data_offset, data_size = self._parse_header(fh)
+            # Streaming writers leave the size as 0xFFFFFFFF, and truncated
+            # files claim more than they hold, so trust the file length
+            data_size = min(data_size, os.fstat(fh.fileno()).st_size - data_offset)
+
+        self.samplerate = samplerate
+        self.file_channels = file_channels
+        self.channels = channels or file_channels
+        self.bits = bits
+        frame_bytes = file_channels * bits // 8
+        self.frames = data_size // frame_bytes
+        self.position = 0
+
+        # Integer samples are scaled by their type's maximum, as in load_wav
+        if format_tag == WAVE_FORMAT_IEEE_FLOAT and bits in (32, 64):
+            dtype, shape, self.scale = np.dtype(f"<f{bits // 8}"), (file_channels,), None
+        elif format_tag == WAVE_FORMAT_PCM and bits == 8:
+            dtype, shape, self.scale = np.dtype(np.uint8), (file_channels,), np.iinfo(np.uint8).max
+        elif format_tag == WAVE_FORMAT_PCM and bits in (16, 32):
+            dtype, shape, self.scale = np.dtype(f"<i{bits // 8}"), (file_channels,), np.iinfo(f"<i{bits // 8}").max
+        elif format_tag == WAVE_FORMAT_PCM and bits == 24:
+            # Raw bytes, widened to int32 per block like scipy reads them
+            dtype, shape, self.scale = np.dtype(np.uint8), (file_channels, 3), np.iinfo(np.int32).max
+        else:
+            raise ValueError(f"Unsupported WAV format {format_tag} with {bits} bits: {wav_path}")
+
+        if self.frames > 0:
+            self.data = np.memmap(wav_path, dtype=dtype, mode="r", offset=data_offset, shape=(self.frames,) + shape)
+        else:
+            self.data = np.zeros((0,) + shape, dtype=dtype)
+        self._wide = np.zeros((0, 0, 4), dtype=np.uint8)
+
+    @staticmethod
+    def _parse_header(fh) -> Tuple[int, int, int, int, int, int]:
+        # Walk the RIFF chunks up to the data chunk, reading nothing else
+        header = fh.read(12)
+        if len(header) < 12 or header[:4] != b"RIFF" or header[8:] != b"WAVE":
+            raise ValueError(f"Not a little-endian RIFF WAVE file: {fh.name}")
+        fmt = None
+        while True:
+            header = fh.read(8)
+            if len(header) < 8:
+                raise ValueError(f"No data chunk in {fh.name}")
+            chunk_id, size = struct.unpack("<4sI", header)
+            if chunk_id == b"fmt ":
+                body = fh.read(size)
+                if len(body) < 16:
+                    raise ValueError(f"Truncated fmt chunk in {fh.name}")
+                format_tag, channels, samplerate, _, _, bits = struct.unpack("<HHIIHH", body[:16])
+                if format_tag == WAVE_FORMAT_EXTENSIBLE and size >= 26:
+                    # The real format is the first two bytes of the sub-format GUID
+                    format_tag = struct.unpack("<H", body[24:26])[0]
+                fmt = (format_tag, channels, samplerate, bits)
+                fh.seek(size & 1, 1)
+            elif chunk_id == b"data":
+                if fmt is None:
+                    raise ValueError(f"Data chunk before fmt chunk in {fh.name}")
+                return fmt + (fh.tell(), size)
+            else:
+                # Chunks are padded to an even size
+                fh.seek(size + (size & 1), 1)
+
+    @property
+    def remaining(self) -> int:
+        """
+        Return the number of frames left to read.
+        """
+        return max(0, self.frames - self.position)
+
+    def seek(self, frame: int) -> None:
+        """
+        Move the read position. Nothing is read until the next read_into().
+
+        Parameters:
+            frame (int): Frame to read next, clamped to the file.
+        """
+        self.position = min(max(0, frame), self.frames)
+
+    def read_into(self, out: np.ndarray) -> int:
+        """
+        Convert the next frames into a caller-owned buffer and advance.
+
+        Parameters:
+            out (np.ndarray): float32 buffer of shape (frames, channels) to fill from the start.
+
+        Returns:
+            int: The number of frames read, fewer than requested at the end of the file.
+        """
+        start = self.position
+        n = min(out.shape[0], self.frames - start)
+        if n <= 0:
+            return 0
+        used = min(self.channels, self.file_channels)
+        block = out[:n, :used]
+        raw = self.data[start:start + n, :used]
+        if self.bits == 24:
+            # Sample bytes go in the top three bytes of a little-endian int32
+            if self._wide.shape[0] < n or self._wide.shape[1] != used:
+                self._wide = np.zeros((max(n, self._wide.shape[0]), used, 4), dtype=np.uint8)
+            wide = self._wide[:n]
+            wide[..., 1:] = raw
+            raw = wide.view("<i4")[..., 0]
+        block[...] = raw
+        if self.scale is not None:
+            np.divide(block, self.scale, out=block)
+        out[:n, used:] = 0
+        self.position = start + n
+        return n
+
+    def close(self) -> None:
+        """
+        Release the memory map.
+        """
+        self.data = None
+
+
+def wav_samplerate(wav_path: str) -> int:
+    """
+    Read a WAV file's sample rate from its header alone.
+
+    Parameters:
+        wav_path (str): Path to the WAV file.
+
+    Returns:
+        int: The sample rate.
+    """
+    source = WavSource(wav_path)
+    samplerate = source.samplerate
+    source.close()
+    return samplerate
@@ -5,13 +5,15 @@ import threading
 from typing import Any, List, Optional
 
 import numpy as np
-from scipy.io import wavfile
 
 from arg_parser import get_config
-from signal_processing.audio_io import audio_passthrough, audio_playback, audio_record
-from file_utils import save_recording
-from visualizer.visualizer import start_visualizer_process
+from signal_processing.audio_processor import BUFFER_BLOCKSIZE
+from signal_processing.offline_render import audio_batch_render, audio_render
+from file_utils import save_recording, wav_samplerate
 from message_bus import MessageBus
+from shared_params import SharedParameterBlock
+from shared_ring import SharedAudioRing
+from dsp_profiler import DSPProfiler
 
 def setup_logging(level: str) -> None:
     """
@@ -36,8 +38,8 @@ def get_visualizer_sr(args: Any) -> int:
         int: The sample rate to use.
     """
     if args.mode == "playback":
-        wav_sr, _ = wavfile.read(args.wav_path)
-        return wav_sr
+        # Only the header is read
+        return wav_samplerate(args.wav_path)
     else:
         return args.sr
 
@@ -58,9 +60,10 @@ def setup_signal_handlers(audio_stop_event: Any, vis_stop_event: Any) -> None:
 def start_audio_thread(
     args: Any,
     recorded_frames: List[np.ndarray],
-    vis_waveform_queue: Any,
+    waveform_ring: SharedAudioRing,
     audio_stop_event: threading.Event,
-    message_bus: MessageBus
+    message_bus: MessageBus,
+    profiler: Optional[DSPProfiler] = None
 ) -> Optional[threading.Thread]:
     """
     Start the audio processing thread for the selected mode.
@@ -68,37 +71,58 @@ def start_audio_thread(
     Parameters:
         args (Any): The parsed command-line arguments.
         recorded_frames (List[np.ndarray]): List to store recorded audio frames.
-        vis_waveform_queue (Any): Queue for waveform data.
+        waveform_ring (SharedAudioRing): Shared ring carrying the waveform to the visualizer.
         audio_stop_event (threading.Event): Event to signal audio shutdown.
+        profiler (Optional[DSPProfiler]): Profiler timing the audio callbacks, if enabled.
 
     Returns:
         Optional[threading.Thread]: The created audio thread, or None if mode is unknown.
     """
+    # Imported here so the offline modes run without PortAudio installed
+    from signal_processing.audio_io import audio_latency, audio_passthrough, audio_playback, audio_record
+
+    blocksize = args.blocksize or BUFFER_BLOCKSIZE
     if args.mode == "passthrough":
         return threading.Thread(
             target=audio_passthrough,
             args=(args.in_idx, args.out_idx, args.sr, args.in_ch, args.out_ch,
-                  recorded_frames, vis_waveform_queue, audio_stop_event),
+                  recorded_frames, waveform_ring, audio_stop_event),
             kwargs={
                 "save_recording": args.save_recording,
-                "message_bus": message_bus
+                "message_bus": message_bus,
+                "blocksize": blocksize,
+                "profiler": profiler
             }
         )
     elif args.mode == "record":
         return threading.Thread(
             target=audio_record,
             args=(args.in_idx, args.sr, args.in_ch,
-                  recorded_frames, vis_waveform_queue, audio_stop_event),
+                  recorded_frames, waveform_ring, audio_stop_event),
             kwargs={
-                "message_bus": message_bus
+                "message_bus": message_bus,
+                "blocksize": blocksize,
+                "profiler": profiler
             }
         )
     elif args.mode == "playback":
         return threading.Thread(
             target=audio_playback,
-            args=(args.out_idx, args.out_ch, args.wav_path, audio_stop_event, vis_waveform_queue),
+            args=(args.out_idx, args.out_ch, args.wav_path, audio_stop_event, waveform_ring),
             kwargs={
-                "message_bus": message_bus
+                "message_bus": message_bus,
+                "blocksize": blocksize,
+                "profiler": profiler
+            }
+        )
+    elif args.mode == "latency":
+        return threading.Thread(
+            target=audio_latency,
+            args=(args.in_idx, args.out_idx, args.sr, args.in_ch, args.out_ch,
+                  waveform_ring, audio_stop_event),
+            kwargs={
+                "trials": args.trials,
+                "blocksize": blocksize
             }
         )
     else:
@@ -127,9 +151,11 @@ def cleanup(
     visualizer_proc: Any,
     audio_stop_event: Any,
     audio_thread: threading.Thread,
-    vis_waveform_queue: Any,
+    waveform_ring: SharedAudioRing,
     args: Any,
-    recorded_frames: List[np.ndarray]
+    recorded_frames: List[np.ndarray],
+    parameter_block: SharedParameterBlock,
+    profiler: Optional[DSPProfiler] = None
 ) -> None:
     """
     Clean up all resources and ensure proper shutdown of processes and threads.
@@ -139,19 +165,24 @@ def cleanup(
         visualizer_proc (Any): The visualizer process.
         audio_stop_event (multiprocessing.Event): Event to signal audio shutdown.
         audio_thread (threading.Thread): The audio processing thread.
-        vis_waveform_queue (Any): Queue for waveform data.
+        waveform_ring (SharedAudioRing): Shared ring carrying the waveform to the visualizer.
         args (Any): The parsed command-line arguments.
         recorded_frames (List[np.ndarray]): List of recorded audio frames.
+        parameter_block (SharedParameterBlock): Shared parameter memory to free.
+        profiler (Optional[DSPProfiler]): Profiler to report and free, if enabled.
     """
     vis_stop_event.set()
     visualizer_proc.join(timeout=3)
     audio_stop_event.set()
     audio_thread.join(timeout=3)
-    try:
-        vis_waveform_queue.close()
-        vis_waveform_queue.join_thread()
-    except Exception as e:
-        logging.debug(f"Error closing visualizer queue: {e}")
+    if waveform_ring.overruns:
+        logging.info(f"Visualizer fell behind {waveform_ring.overruns} times, {waveform_ring.dropped_samples} samples dropped")
+    waveform_ring.close()
+    parameter_block.close()
+    if profiler is not None:
+        for line in profiler.summary():
+            logging.info(line)
+        profiler.close()
     if  "record" or (args.save_recording and args.mode == "passthrough"):
         save_recording(args.sr, recorded_frames)
 
@@ -159,14 +190,31 @@ def main() -> None:
     """
     Main entry point for the audio visualizer and recorder application.
     """
-    # Ensure the global message queue is created in the main process
-    manager = multiprocessing.Manager()
-    queue = manager.Queue()
-    message_bus = MessageBus(queue)
-    
     args = get_config()
     setup_logging(getattr(args, "log_level", "INFO"))
 
+    if args.mode == "render":
+        # Offline modes involve no devices, visualizer or shared memory
+        audio_render(args.wav_path, args.output_path, args.settings,
+                     args.blocksize or BUFFER_BLOCKSIZE, args.out_ch)
+        return
+    if args.mode == "batch":
+        succeeded = audio_batch_render(args.wav_path, args.output_path, args.settings,
+                                       args.blocksize or BUFFER_BLOCKSIZE, args.out_ch, args.workers)
+        # Nonzero exit so scheduled jobs notice failed files
+        if not succeeded:
+            exit(1)
+        return
+
+    # Realtime modes only, the offline ones run on machines without Qt
+    from visualizer.visualizer import start_visualizer_process
+
+    # Plugin parameters go through shared memory, everything else through a
+    # plain queue. Both are created in the main process and inherited by the visualizer
+    parameter_block = SharedParameterBlock()
+    message_bus = MessageBus(multiprocessing.Queue(), parameter_block)
+    profiler = DSPProfiler() if args.profile else None
+
     logging.info(f"Using sample rate: {args.sr} Hz")
     logging.info(f"Input device: {args.in_idx}, Output device: {args.out_idx}")
 
@@ -175,26 +223,32 @@ def main() -> None:
     vis_stop_event = multiprocessing.Event()
     audio_stop_event = multiprocessing.Event()
 
-    visualizer_proc, vis_waveform_queue = start_visualizer_process(
+    visualizer_proc, waveform_ring = start_visualizer_process(
         sr=visualizer_sr,
         stop_event=vis_stop_event,
-        waveform_queue=None,
+        waveform_ring=None,
         audio_stop_event=audio_stop_event,
-        message_bus=message_bus
+        message_bus=message_bus,
+        profiler=profiler,
+        max_block=args.blocksize or BUFFER_BLOCKSIZE
     )
 
     setup_signal_handlers(audio_stop_event, vis_stop_event)
 
     recorded_frames = []
-    audio_thread = start_audio_thread(args, recorded_frames, vis_waveform_queue, audio_stop_event, message_bus)
+    audio_thread = start_audio_thread(args, recorded_frames, waveform_ring, audio_stop_event, message_bus, profiler)
     if audio_thread is None:
+        parameter_block.close()
+        waveform_ring.close()
+        if profiler is not None:
+            profiler.close()
         return
 
     audio_thread.start()
     responsive_join(audio_thread, vis_stop_event, audio_stop_event)
     cleanup(
         vis_stop_event, visualizer_proc, audio_stop_event, audio_thread,
-        vis_waveform_queue, args, recorded_frames
+        waveform_ring, args, recorded_frames, parameter_block, profiler
     )
 
 if __name__ == '__main__':
@@ -1,6 +1,17 @@
-import multiprocessing
+import time
 from queue import Empty
-from typing import Optional
+from typing import Dict, List, Optional
+
+# Plugins available to the processing chain, by key, in their default order
+CHAIN_PLUGINS: Dict[str, str] = {
+    "reverb": "Reverb",
+    "freeverb": "Freeverb",
+    "convolution_reverb": "Convolution Reverb",
+    "amplifier": "Amplifier",
+}
+
+# Default cap on how often each message type is delivered to the audio side
+DEFAULT_MAX_UPDATE_RATE = 30.0
 
 class Message:
     """
@@ -11,21 +22,135 @@ class Message:
 class MessageBus:
     """
     Multiprocess-safe message bus for sending commands to the audio processing code.
+
+    Plugin parameter messages are written to a shared-memory parameter block
+    (see shared_params.SharedParameterBlock) when one is given. The audio
+    engine's listener thread polls and decodes them, and the audio callback
+    picks up the resulting plugin snapshots at its next block. All other
+    messages, such as IR paths and the chain order, go through the queue.
+
+    Delivery is latest-value-wins per message type: the receiver only ever
+    sees the newest pending message of each type, at most max_update_rate
+    times per second. Messages replaced before delivery are counted in stats(),
+    and parameter polls put off because nothing unread was due yet in
+    deferred_polls.
     """
-    def __init__(self, queue):
+    def __init__(self, queue, parameter_block=None, max_update_rate: Optional[float] = DEFAULT_MAX_UPDATE_RATE):
         self.queue = queue
+        self.parameter_block = parameter_block
+        self.min_interval = 1.0 / max_update_rate if max_update_rate else 0.0
+        # Receiver-side state, newest undelivered queue message per type in arrival order
+        self.pending: Dict[str, "Message"] = {}
+        self.last_delivered: Dict[str, float] = {}
+        self.dropped: Dict[str, int] = {}
+        # Parameter rows left unread for rate limiting are not polled again
+        # before next_due unless another write comes in
+        self.next_due = 0.0
+        self._deferred_writes = -1
+        self.deferred_polls = 0
 
     def send(self, message: "Message") -> None:
+        if self.parameter_block is not None and self.parameter_block.write(message):
+            return
         self.queue.put(message)
 
+    def _due_in(self, message_type: str, now: float) -> float:
+        # Seconds until this message type may be delivered again
+        return self.last_delivered.get(message_type, -self.min_interval) + self.min_interval - now
+
+    def parameters_changed(self) -> bool:
+        """
+        Cheaply check whether poll_parameters() has anything to deliver.
+
+        Returns:
+            bool: True if a row was written since the last poll and may be due.
+        """
+        if self.parameter_block is None or not self.parameter_block.changed():
+            return False
+        if self.parameter_block.write_count() == self._deferred_writes and time.monotonic() < self.next_due:
+            self.deferred_polls += 1
+            return False
+        return True
+
+    def poll_parameters(self) -> List["Message"]:
+        """
+        Read the parameter messages written since the last poll, without blocking.
+
+        Message types delivered too recently stay unread in the block, where
+        newer writes keep replacing them until they are due.
+
+        Returns:
+            List[Message]: The newest settings message of each changed plugin.
+        """
+        if self.parameter_block is None:
+            return []
+        now = time.monotonic()
+        # Taken before the poll, so any later write triggers the next one
+        self._deferred_writes = self.parameter_block.write_count()
+        due = []
+        next_due = None
+        for message_type in self.parameter_block.message_types:
+            due_in = self._due_in(message_type.type, now)
+            if due_in <= 0:
+                due.append(message_type)
+            elif next_due is None or due_in < next_due:
+                next_due = due_in
+        # Rows read now need no deferral, only those still waiting on their rate limit
+        self.next_due = now + (next_due or 0.0)
+        messages = self.parameter_block.poll(due)
+        for message in messages:
+            self.last_delivered[message.type] = now
+        return messages
+
+    def _enqueue(self, message: "Message") -> None:
+        if self.pending.pop(message.type, None) is not None:
+            self.dropped[message.type] = self.dropped.get(message.type, 0) + 1
+        self.pending[message.type] = message
+
     def receive(self, timeout: float = 0.01) -> Optional["Message"]:
+        """
+        Return the newest pending message of the first type that is due.
+
+        Parameters:
+            timeout (float): Longest time to wait for a message, in seconds.
+
+        Returns:
+            Optional[Message]: The message, or None if none was due in time.
+        """
+        now = time.monotonic()
+        wait = timeout
+        if self.pending:
+            wait = min(wait, max(0.0, min(self._due_in(key, now) for key in self.pending)))
         try:
-            return self.queue.get(timeout=timeout)
+            self._enqueue(self.queue.get(timeout=wait) if wait > 0 else self.queue.get_nowait())
+            # Fold in everything else already waiting
+            while True:
+                self._enqueue(self.queue.get_nowait())
         except Empty:
-            return None
+            pass
+
+        now = time.monotonic()
+        for key in self.pending:
+            if self._due_in(key, now) <= 0:
+                self.last_delivered[key] = now
+                return self.pending.pop(key)
+        return None
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Count the messages replaced by a newer one before delivery, per type.
+
+        Returns:
+            Dict[str, int]: Dropped message counts keyed by message type.
+        """
+        counts = dict(self.dropped)
+        if self.parameter_block is not None:
+            for key, skipped in self.parameter_block.skipped.items():
+                counts[key] = counts.get(key, 0) + skipped
+        return counts
 
     def has_message(self) -> bool:
-        return self.queue.qsize() > 0
+        return bool(self.pending) or self.queue.qsize() > 0
 
 class ReverbSettingsMessage(Message):
     """
@@ -59,3 +184,44 @@ class AmplifierSettingsMessage(Message):
         self.scale = scale
         self.enabled = enabled
         self.allow_clipping = allow_clipping
+
+class ConvolutionReverbSettingsMessage(Message):
+    """
+    Message to enable or disable convolution reverb and set its impulse response.
+    """
+    type = "convolution_reverb_settings"
+
+    def __init__(self, enabled: bool, ir_path: str, wet_level: float, allow_clipping: bool):
+        self.enabled = enabled
+        self.ir_path = ir_path
+        self.wet_level = wet_level
+        self.allow_clipping = allow_clipping
+
+class FreeverbSettingsMessage(Message):
+    """
+    Message to enable or disable the Freeverb-style reverb and set its parameters.
+    """
+    type = "freeverb_settings"
+
+    def __init__(
+        self,
+        enabled: bool,
+        room_size: float,
+        damping: float,
+        wet_level: float,
+        allow_clipping: bool
+    ):
+        self.enabled = enabled
+        self.room_size = room_size
+        self.damping = damping
+        self.wet_level = wet_level
+        self.allow_clipping = allow_clipping
+
+class PluginChainMessage(Message):
+    """
+    Message to set which plugins are in the processing chain and their order.
+    """
+    type = "plugin_chain"
+
+    def __init__(self, order: List[str]):
+        self.order = order
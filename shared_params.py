@@ -0,0 +1,174 @@
+from multiprocessing import shared_memory
+from typing import Collection, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from message_bus import (
+    AmplifierSettingsMessage,
+    FreeverbSettingsMessage,
+    Message,
+    ReverbSettingsMessage,
+)
+
+# Messages carried through shared memory, with each field and the type it is decoded to
+PARAMETER_LAYOUT: Dict[type, Tuple[Tuple[str, type], ...]] = {
+    ReverbSettingsMessage: (
+        ("enabled", bool),
+        ("decay", float),
+        ("delay_samps", int),
+        ("wet_level", float),
+        ("taps", int),
+        ("allow_clipping", bool),
+    ),
+    FreeverbSettingsMessage: (
+        ("enabled", bool),
+        ("room_size", float),
+        ("damping", float),
+        ("wet_level", float),
+        ("allow_clipping", bool),
+    ),
+    AmplifierSettingsMessage: (
+        ("scale", float),
+        ("enabled", bool),
+        ("allow_clipping", bool),
+    ),
+}
+
+
+class SharedParameterBlock:
+    """
+    Plugin parameter area in shared memory, written by the GUI process and
+    read by the audio engine without any IPC round trip.
+
+    Every message type in PARAMETER_LAYOUT owns one row of float64 fields and
+    an int64 sequence counter. Writers follow a seqlock protocol: bump the
+    counter to odd, write the fields, bump it back to even. Readers copy the
+    fields only when the counter is even and unchanged across the copy, so a
+    torn read is discarded and retried at the next poll. There is one writer
+    per row (the GUI thread), and the newest values always win.
+
+    A single int64 write counter, bumped after every completed write, lets
+    the reader check for changes by comparing one scalar.
+    """
+
+    def __init__(self, name: Optional[str] = None) -> None:
+        """
+        Create a new zeroed parameter block, or attach to an existing one.
+
+        Parameters:
+            name (Optional[str]): Name of an existing block to attach to.
+                A new block is created if None.
+        """
+        self.message_types = list(PARAMETER_LAYOUT)
+        self.fields = max(len(layout) for layout in PARAMETER_LAYOUT.values())
+        rows = len(self.message_types)
+        size = 8 + rows * 8 + rows * self.fields * 8
+
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+            self.shm.buf[:size] = bytes(size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self._attach_views()
+
+    def _attach_views(self) -> None:
+        rows = len(self.message_types)
+        self.writes = np.ndarray((1,), dtype=np.int64, buffer=self.shm.buf)
+        self.sequence = np.ndarray((rows,), dtype=np.int64, buffer=self.shm.buf, offset=8)
+        self.values = np.ndarray((rows, self.fields), dtype=np.float64, buffer=self.shm.buf, offset=8 + rows * 8)
+        # Sequence number last consumed by this process, per row
+        self._seen = self.sequence.copy()
+        # Write counter as of the last poll that left no row unread
+        self._writes_seen = int(self.writes[0])
+        # Writes overwritten before this process read them, per message type
+        self.skipped: Dict[str, int] = {message_type.type: 0 for message_type in self.message_types}
+
+    def __getstate__(self):
+        # Child processes attach to the same segment by name
+        return {"name": self.shm.name}
+
+    def __setstate__(self, state) -> None:
+        self.__init__(state["name"])
+
+    def write(self, message: Message) -> bool:
+        """
+        Publish a message's parameters, replacing any unread values.
+
+        Parameters:
+            message (Message): The settings message to publish.
+
+        Returns:
+            bool: False if the message type has no parameter area.
+        """
+        layout = PARAMETER_LAYOUT.get(type(message))
+        if layout is None:
+            return False
+        row = self.message_types.index(type(message))
+        self.sequence[row] += 1
+        for column, (field, _) in enumerate(layout):
+            self.values[row, column] = float(getattr(message, field))
+        self.sequence[row] += 1
+        self.writes[0] += 1
+        return True
+
+    def changed(self) -> bool:
+        """
+        Cheaply check whether any row has been written since the last poll.
+        Compares one scalar and allocates nothing, so it can be called on
+        every pass of a polling loop.
+        """
+        return self.write_count() != self._writes_seen
+
+    def write_count(self) -> int:
+        """
+        Return the number of writes completed on the block so far.
+        """
+        return int(self.writes[0])
+
+    def poll(self, types: Optional[Collection[type]] = None) -> List[Message]:
+        """
+        Read every row written since the last poll.
+
+        Parameters:
+            types (Optional[Collection[type]]): Only read rows of these message
+                types, leaving the others unread. Reads every row if None.
+
+        Returns:
+            List[Message]: The newest settings message of each changed row.
+        """
+        # Taken before any row is read, writes after this keep changed() true
+        writes = self.write_count()
+        unread = False
+        messages = []
+        for row, message_type in enumerate(self.message_types):
+            before = int(self.sequence[row])
+            if before == self._seen[row]:
+                continue
+            if before % 2 or (types is not None and message_type not in types):
+                unread = True
+                continue
+            layout = PARAMETER_LAYOUT[message_type]
+            values = self.values[row, :len(layout)].tolist()
+            if int(self.sequence[row]) != before:
+                # Writer got in mid-copy, try again next poll
+                unread = True
+                continue
+            # Each write advances the counter by two
+            self.skipped[message_type.type] += (before - int(self._seen[row])) // 2 - 1
+            self._seen[row] = before
+            messages.append(message_type(**{
+                field: cast(value) for (field, cast), value in zip(layout, values)
+            }))
+        if not unread:
+            self._writes_seen = writes
+        return messages
+
+    def close(self) -> None:
+        """
+        Detach from the shared memory, and free it if this process created it.
+        """
+        del self.writes, self.sequence, self.values
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
@@ -0,0 +1,199 @@
+import time
+from multiprocessing import shared_memory
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Header slots, int64 each
+WRITE_CURSOR = 0
+READ_CURSOR = 1
+OVERRUNS = 2
+DROPPED_SAMPLES = 3
+# perf_counter_ns() of the latest write, a system-wide clock on Linux and Windows
+LAST_WRITE_NS = 4
+HEADER_SLOTS = 5
+
+
+class SharedAudioRing:
+    """
+    Single-producer/single-consumer ring of float32 samples in shared memory,
+    used to hand audio from the audio thread to the visualizer process.
+
+    The header holds monotonic write and read cursors counted in samples. The
+    producer copies samples in and then publishes the write cursor; the
+    consumer copies them out and then publishes the read cursor. Both sides
+    work on NumPy views of the same memory, so blocks cross the process
+    boundary with no pickling and no per-block allocation.
+
+    The producer never waits. If the consumer falls more than one ring
+    behind, the oldest samples are overwritten; the consumer notices when it
+    next reads, skips ahead and counts an overrun.
+
+    A write in progress may already be overwriting up to max_write samples
+    past the published write cursor, so the consumer treats only the newest
+    capacity - max_write samples as readable. Writes must not exceed max_write.
+    """
+
+    def __init__(self, capacity: int, max_write: int, name: Optional[str] = None) -> None:
+        """
+        Create a new ring, or attach to an existing one.
+
+        Parameters:
+            capacity (int): Ring size in samples.
+            max_write (int): Largest block the producer writes at once, in samples.
+            name (Optional[str]): Name of an existing ring to attach to.
+                A new ring is created if None.
+        """
+        if not 0 < max_write < capacity:
+            raise ValueError(f"max_write must be between 1 and {capacity - 1}, got {max_write}")
+        self.capacity = capacity
+        self.max_write = max_write
+        # Samples the consumer may read without racing a write in progress
+        self.readable = capacity - max_write
+        size = HEADER_SLOTS * 8 + capacity * 4
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+            self.shm.buf[:size] = bytes(size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.header = np.ndarray((HEADER_SLOTS,), dtype=np.int64, buffer=self.shm.buf)
+        self.data = np.ndarray((capacity,), dtype=np.float32, buffer=self.shm.buf, offset=HEADER_SLOTS * 8)
+
+    def __getstate__(self):
+        # The consumer process attaches to the same segment by name
+        return {"capacity": self.capacity, "max_write": self.max_write, "name": self.shm.name}
+
+    def __setstate__(self, state) -> None:
+        self.__init__(state["capacity"], state["max_write"], state["name"])
+
+    def _reserve(self, n: int):
+        # Split the next n write positions at the wrap point
+        cursor = int(self.header[WRITE_CURSOR])
+        pos = cursor % self.capacity
+        first = min(n, self.capacity - pos)
+        return cursor, pos, first
+
+    def write(self, samples: np.ndarray) -> None:
+        """
+        Append samples, keeping only the newest capacity of them.
+
+        Parameters:
+            samples (np.ndarray): 1-D block of samples.
+        """
+        samples = samples[-self.capacity:]
+        n = samples.shape[0]
+        cursor, pos, first = self._reserve(n)
+        self.data[pos:pos + first] = samples[:first]
+        self.data[:n - first] = samples[first:]
+        self._publish(cursor + n)
+
+    def write_mono(self, block: np.ndarray) -> None:
+        """
+        Mix a block down to mono directly into the ring.
+
+        Parameters:
+            block (np.ndarray): Audio of shape (frames, channels).
+        """
+        block = block[-self.capacity:]
+        n = block.shape[0]
+        cursor, pos, first = self._reserve(n)
+        np.mean(block[:first], axis=1, out=self.data[pos:pos + first])
+        if first < n:
+            np.mean(block[first:], axis=1, out=self.data[:n - first])
+        self._publish(cursor + n)
+
+    def _publish(self, cursor: int) -> None:
+        self.header[LAST_WRITE_NS] = time.perf_counter_ns()
+        self.header[WRITE_CURSOR] = cursor
+
+    def available(self) -> int:
+        """
+        Number of unread samples, capped at what can be read safely.
+        """
+        return min(int(self.header[WRITE_CURSOR] - self.header[READ_CURSOR]), self.readable)
+
+    def read_into(self, out: np.ndarray) -> int:
+        """
+        Copy the oldest unread samples into a preallocated buffer.
+
+        Parameters:
+            out (np.ndarray): 1-D float32 buffer to fill from the start.
+
+        Returns:
+            int: The number of samples copied.
+        """
+        write = int(self.header[WRITE_CURSOR])
+        read = int(self.header[READ_CURSOR])
+        if write - read > self.readable:
+            self._count_overrun(write - self.readable - read)
+            read = write - self.readable
+
+        n = min(write - read, out.shape[0])
+        if n <= 0:
+            return 0
+        pos = read % self.capacity
+        first = min(n, self.capacity - pos)
+        out[:first] = self.data[pos:pos + first]
+        out[first:n] = self.data[:n - first]
+
+        # The producer may have lapped the start of the copy while it ran,
+        # including the block it may be writing right now
+        torn = int(self.header[WRITE_CURSOR]) + self.max_write - self.capacity - read
+        if torn > 0:
+            torn = min(torn, n)
+            self._count_overrun(torn)
+            out[:n - torn] = out[torn:n]
+            read += torn
+            n -= torn
+
+        self.header[READ_CURSOR] = read + n
+        return n
+
+    def discard(self, n: int) -> None:
+        """
+        Skip the oldest n unread samples without copying them.
+
+        Parameters:
+            n (int): The number of samples to skip, capped at what is unread.
+        """
+        write = int(self.header[WRITE_CURSOR])
+        read = int(self.header[READ_CURSOR])
+        if write - read > self.readable:
+            self._count_overrun(write - self.readable - read)
+            read = write - self.readable
+        self.header[READ_CURSOR] = min(read + max(0, n), write)
+
+    def last_write(self) -> Tuple[int, int]:
+        """
+        Time of the latest write and the write cursor it published.
+
+        Returns:
+            Tuple[int, int]: perf_counter_ns() timestamp and cursor in samples.
+        """
+        return int(self.header[LAST_WRITE_NS]), int(self.header[WRITE_CURSOR])
+
+    @property
+    def read_cursor(self) -> int:
+        return int(self.header[READ_CURSOR])
+
+    def _count_overrun(self, samples: int) -> None:
+        self.header[OVERRUNS] += 1
+        self.header[DROPPED_SAMPLES] += samples
+
+    @property
+    def overruns(self) -> int:
+        return int(self.header[OVERRUNS])
+
+    @property
+    def dropped_samples(self) -> int:
+        return int(self.header[DROPPED_SAMPLES])
+
+    def close(self) -> None:
+        """
+        Detach from the shared memory, and free it if this process created it.
+        """
+        del self.header, self.data
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
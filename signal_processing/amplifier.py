@@ -1,17 +1,28 @@
-class AmplifierPlugin:
+from typing import NamedTuple
+
+import numpy as np
+
+from signal_processing.plugin import AudioPlugin, prevent_clipping
+
+
+class AmplifierParams(NamedTuple):
+    scale: float
+    allow_clipping: bool
+
+
+class AmplifierPlugin(AudioPlugin):
     def __init__(self, scale: float = 1.0, allow_clipping: bool = True):
-        self.scale = scale
-        self.allow_clipping = allow_clipping
+        super().__init__()
+        self.params = AmplifierParams(scale, allow_clipping)
 
-    def apply(self, input_signal):
-        output = input_signal * self.scale
-        if not self.allow_clipping:
-            max_val = max(1.0, abs(output).max())
-            output = output / max_val
-        return output
+    def process(self, input_signal, output):
+        params = self.params
+        np.multiply(input_signal, params.scale, out=output)
+        if not params.allow_clipping:
+            prevent_clipping(output)
 
     def set_scale(self, scale: float):
-        self.scale = scale
+        self.update_params(scale=scale)
 
     def set_allow_clipping(self, allow_clipping: bool):
-        self.allow_clipping = allow_clipping
+        self.update_params(allow_clipping=allow_clipping)
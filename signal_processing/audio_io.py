@@ -1,36 +1,132 @@
 import logging
 import threading
-from typing import Any, List
-from signal_processing.audio_processor import AudioProcessor
+from time import perf_counter_ns
+from typing import Any, List, Optional
+from signal_processing.audio_processor import BUFFER_BLOCKSIZE, AudioProcessor
 
 import numpy as np
 import sounddevice as sd  
-from scipy.io import wavfile
 
+from dsp_profiler import DSPProfiler
+from file_utils import WavSource
+from signal_processing.latency import format_summary, make_mls, measure_round_trips, summarize_ms
 from message_bus import MessageBus  
-
-BUFFER_BLOCKSIZE = 4096
+from shared_ring import SharedAudioRing
 
 class RingBuffer:
     """
-    Thread-safe ring buffer for storing audio data.
+    Single-producer/single-consumer ring buffer for handing audio from the
+    input callback to the output callback.
+
+    The producer owns `write_count` and the consumer owns `read_count`. Both
+    are monotonic frame counts, and each side only ever assigns its own. Data
+    is copied before the count that publishes it is advanced, so neither side
+    needs a lock on the realtime path.
+
+    The producer never waits. If the consumer falls more than one buffer
+    behind, the oldest frames are overwritten; the consumer notices when it
+    next reads, skips ahead and counts an overrun. Reads that find too few
+    frames are padded with silence and counted as underruns.
+
+    A write in progress may already be overwriting up to max_write frames
+    past the published write count, so the consumer treats only the newest
+    size - max_write frames as readable.
     """
 
-    def __init__(self, size: int, channels: int) -> None:
+    def __init__(self, size: int, channels: int, max_write: int) -> None:
         """
         Initialize the ring buffer with the given size and channel count.
 
         Parameters:
             size (int): The number of frames in the buffer.
             channels (int): The number of audio channels.
+            max_write (int): Largest block the producer writes at once, in frames.
         """
+        if not 0 < max_write < size:
+            raise ValueError(f"max_write must be between 1 and {size - 1}, got {max_write}")
         self.size = size
         self.channels = channels
+        self.max_write = max_write
+        # Frames the consumer may read without racing a write in progress
+        self.readable = size - max_write
         self.buffer = np.zeros((size, channels), dtype=np.float32)
-        self.write_index = 0
-        self.read_index = 0
-        self.filled = 0
-        self.lock = threading.Lock()
+        self.write_count = 0
+        self.read_count = 0
+        # Updated by the consumer only
+        self.overruns = 0
+        self.overrun_frames = 0
+        self.underruns = 0
+        self.underrun_frames = 0
+
+    @property
+    def filled(self) -> int:
+        """
+        Number of unread frames, capped at what can be read safely.
+        """
+        return min(self.write_count - self.read_count, self.readable)
+
+    def write_from(self, data: np.ndarray) -> None:
+        """
+        Copy audio into the ring buffer, keeping only the newest size frames.
+
+        Parameters:
+            data (np.ndarray): Audio data to write (frames, channels).
+        """
+        # Frames that cannot fit still advance the count, so the reader sees them as lost
+        skipped = max(0, data.shape[0] - self.size)
+        data = data[skipped:]
+        n = data.shape[0]
+        cursor = self.write_count + skipped
+        pos = cursor % self.size
+        first = min(n, self.size - pos)
+        self.buffer[pos:pos + first] = data[:first]
+        self.buffer[:n - first] = data[first:]
+        self.write_count = cursor + n
+
+    def read_into(self, out: np.ndarray) -> int:
+        """
+        Fill a caller-owned buffer with the oldest unread frames, padding with
+        silence if fewer are available.
+
+        Parameters:
+            out (np.ndarray): Buffer of shape (frames, channels) to fill.
+
+        Returns:
+            int: The number of frames read from the ring, the rest are silence.
+        """
+        frames = out.shape[0]
+        write = self.write_count
+        read = self.read_count
+        if write - read > self.readable:
+            self._count_overrun(write - self.readable - read)
+            read = write - self.readable
+
+        n = min(write - read, frames)
+        pos = read % self.size
+        first = min(n, self.size - pos)
+        out[:first] = self.buffer[pos:pos + first]
+        out[first:n] = self.buffer[:n - first]
+
+        # The producer may have lapped the start of the copy while it ran,
+        # including the block it may be writing right now
+        torn = self.write_count + self.max_write - self.size - read
+        if torn > 0:
+            torn = min(torn, n)
+            self._count_overrun(torn)
+            out[:n - torn] = out[torn:n]
+            read += torn
+            n -= torn
+
+        if n < frames:
+            out[n:] = 0
+            self.underruns += 1
+            self.underrun_frames += frames - n
+        self.read_count = read + n
+        return n
+
+    def _count_overrun(self, frames: int) -> None:
+        self.overruns += 1
+        self.overrun_frames += frames
 
     def write(self, data: np.ndarray) -> None:
         """
@@ -39,23 +135,12 @@ class RingBuffer:
         Parameters:
             data (np.ndarray): Audio data to write (frames, channels).
         """
-        with self.lock:
-            n = data.shape[0]
-            end_index = self.size - self.write_index
-            if n <= end_index:
-                self.buffer[self.write_index:self.write_index + n] = data
-            else:
-                self.buffer[self.write_index:] = data[:end_index]
-                self.buffer[:n - end_index] = data[end_index:]
-            self.write_index = (self.write_index + n) % self.size
-            # Overwrite: move read_index forward as well
-            if self.filled + n > self.size:
-                self.read_index = (self.read_index + (n - (self.size - self.filled))) % self.size
-            self.filled = min(self.size, self.filled + n)
+        self.write_from(data)
 
     def read(self, n: int) -> np.ndarray:
         """
-        Read up to n frames from the ring buffer.
+        Read n frames from the ring buffer into a new array. The realtime
+        path uses read_into instead.
 
         Parameters:
             n (int): The number of frames to read.
@@ -63,18 +148,9 @@ class RingBuffer:
         Returns:
             np.ndarray: The audio data read from the buffer (n, channels).
         """
-        with self.lock:
-            to_read = min(n, self.filled)
-            end_index = self.size - self.read_index
-            out = np.zeros((n, self.channels), dtype=np.float32)
-            if to_read <= end_index:
-                out[:to_read] = self.buffer[self.read_index:self.read_index + to_read]
-            else:
-                out[:end_index] = self.buffer[self.read_index:]
-                out[end_index:to_read] = self.buffer[:to_read - end_index]
-            self.read_index = (self.read_index + to_read) % self.size
-            self.filled -= to_read
-            return out
+        out = np.empty((n, self.channels), dtype=np.float32)
+        self.read_into(out)
+        return out
 
 
 def audio_passthrough(
@@ -84,14 +160,21 @@ def audio_passthrough(
     in_ch: int,
     out_ch: int,
     recorded_frames: List[np.ndarray],
-    waveform_queue: Any,
+    waveform_ring: SharedAudioRing,
     stop_event: threading.Event,
     save_recording: bool = False,
-    message_bus: MessageBus = None
+    message_bus: MessageBus = None,
+    blocksize: int = BUFFER_BLOCKSIZE,
+    profiler: Optional[DSPProfiler] = None
 ) -> None:
     """
     Pass audio from the input device to the output device in real time, optionally recording.
 
+    When input and output are the same device, a single duplex stream
+    processes each input block straight into the matching output block, so
+    the only added latency is one block plus the device buffers. Otherwise
+    separate input and output streams are bridged by a RingBuffer.
+
     Parameters:
         input_idx (int): The input device index.
         output_idx (int): The output device index.
@@ -99,40 +182,81 @@ def audio_passthrough(
         in_ch (int): The number of input channels.
         out_ch (int): The number of output channels.
         recorded_frames (List[np.ndarray]): List to store recorded audio frames.
-        waveform_queue (Any): Queue for waveform data.
+        waveform_ring (SharedAudioRing): Ring receiving the mono waveform for the visualizer.
         stop_event (threading.Event): Event to signal stop.
         save_recording (bool): Whether to save the recording.
+        blocksize (int): Frames per callback.
+        profiler (Optional[DSPProfiler]): Times the callbacks and plugin stages if given.
     """
-    ring = RingBuffer(BUFFER_BLOCKSIZE * 8, in_ch)
     audio_processor =  AudioProcessor(stop_event=stop_event, message_bus=message_bus)
+    audio_processor.set_profiler(profiler)
+    audio_processor.prepare(sr, in_ch, blocksize)
+    # Output channels beyond the processed ones are left silent
+    ch = min(in_ch, out_ch)
+
+    def process(indata: np.ndarray) -> np.ndarray:
+        processed = audio_processor.process_audio(indata)
+        if save_recording:
+            recorded_frames.append(processed.copy())
+        waveform_ring.write_mono(processed)
+        return processed
 
-    def input_callback(indata: np.ndarray, _frames: int, _time: Any, status: Any) -> None:
+    if input_idx == output_idx:
+        def duplex_callback(indata: np.ndarray, outdata: np.ndarray, frames: int, _time: Any, status: Any) -> None:
+            if stop_event.is_set():
+                outdata.fill(0)
+                return
+            start = perf_counter_ns()
+            if status:
+                logging.warning(f"Duplex stream status: {status}")
+            outdata[:, :ch] = process(indata)[:, :ch]
+            if out_ch > ch:
+                outdata[:, ch:] = 0
+            if profiler is not None:
+                profiler.record_block(start, frames, status)
+
+        with sd.Stream(
+            device=(input_idx, output_idx),
+            channels=(in_ch, out_ch),
+            samplerate=sr,
+            blocksize=blocksize,
+            callback=duplex_callback,
+            latency='low'
+        ) as stream:
+            logging.info(f"Duplex passthrough, {blocksize} frame blocks, reported latency {stream.latency}")
+            while not stop_event.is_set():
+                sd.sleep(100)
+        return
+
+    # Separate devices run on separate clocks, so bridge them with a ring
+    ring = RingBuffer(blocksize * 8, ch, blocksize)
+
+    def input_callback(indata: np.ndarray, frames: int, _time: Any, status: Any) -> None:
         if stop_event.is_set():
             return
+        start = perf_counter_ns()
         if status:
             logging.warning(f"Input stream status: {status}")
-        processed = audio_processor.process_audio(indata)
-        if save_recording:
-            recorded_frames.append(processed.copy())
-        mono = np.mean(processed, axis=1)
-        waveform_queue.put(mono)
-        ring.write(processed)
+        ring.write_from(process(indata)[:, :ch])
+        if profiler is not None:
+            profiler.record_block(start, frames, status)
 
     def output_callback(outdata: np.ndarray, frames: int, _time: Any, status: Any) -> None:
         if stop_event.is_set():
             return
         if status:
             logging.warning(f"Output stream status: {status}")
-        data = ring.read(frames)
-        outdata[:, :in_ch] = data
-        if out_ch > in_ch:
-            outdata[:, in_ch:] = 0
+        ring.read_into(outdata[:, :ch])
+        if out_ch > ch:
+            outdata[:, ch:] = 0
+        if profiler is not None:
+            profiler.record_status(status)
 
     with sd.InputStream(
         device=input_idx,
         channels=in_ch,
         samplerate=sr,
-        blocksize=BUFFER_BLOCKSIZE,
+        blocksize=blocksize,
         callback=input_callback,
         latency='low'
         
@@ -140,7 +264,7 @@ def audio_passthrough(
         device=output_idx,
         channels=out_ch,
         samplerate=sr,
-        blocksize=BUFFER_BLOCKSIZE,
+        blocksize=blocksize,
         callback=output_callback,
         latency='low'
         
@@ -148,46 +272,60 @@ def audio_passthrough(
         while not stop_event.is_set():
             sd.sleep(100)
 
+    if ring.overruns or ring.underruns:
+        logging.warning(
+            f"Passthrough buffer: {ring.overruns} overruns ({ring.overrun_frames} frames dropped), "
+            f"{ring.underruns} underruns ({ring.underrun_frames} frames of silence)"
+        )
+
 
 def audio_record(
     input_idx: int,
     sr: int,
     in_ch: int,
     recorded_frames: List[np.ndarray],
-    waveform_queue: Any,
+    waveform_ring: SharedAudioRing,
     stop_event: threading.Event,
-    message_bus: MessageBus
+    message_bus: MessageBus,
+    blocksize: int = BUFFER_BLOCKSIZE,
+    profiler: Optional[DSPProfiler] = None
 ) -> None:
     """
-    Record audio from the input device and send waveform data to the queue.
+    Record audio from the input device and send waveform data to the visualizer.
 
     Parameters:
         input_idx (int): The input device index.
         sr (int): The sample rate.
         in_ch (int): The number of input channels.
         recorded_frames (List[np.ndarray]): List to store recorded audio frames.
-        waveform_queue (Any): Queue for waveform data.
+        waveform_ring (SharedAudioRing): Ring receiving the mono waveform for the visualizer.
         stop_event (threading.Event): Event to signal stop.
+        blocksize (int): Frames per callback.
+        profiler (Optional[DSPProfiler]): Times the callbacks and plugin stages if given.
     """
     
     audio_processor =  AudioProcessor(stop_event=stop_event, message_bus=message_bus)
+    audio_processor.set_profiler(profiler)
+    audio_processor.prepare(sr, in_ch, blocksize)
     
     def input_callback(indata: np.ndarray, frames: int, time: Any, status: Any) -> None:
+        start = perf_counter_ns()
         if status:
             logging.warning(f"Input stream status: {status}")
         if stop_event.is_set():
             return
         processed = audio_processor.process_audio(indata)
         recorded_frames.append(processed.copy())
-        mono = np.mean(processed, axis=1)
-        waveform_queue.put(mono)
+        waveform_ring.write_mono(processed)
+        if profiler is not None:
+            profiler.record_block(start, frames, status)
 
 
     with sd.InputStream(
         device=input_idx,
         channels=in_ch,
         samplerate=sr,
-        blocksize=BUFFER_BLOCKSIZE,
+        blocksize=blocksize,
         callback=input_callback,
         latency='low'
     ):
@@ -200,50 +338,45 @@ def audio_playback(
     out_ch: int,
     wav_path: str,
     stop_event: threading.Event,
-    waveform_queue: Any,
-    message_bus: MessageBus
+    waveform_ring: SharedAudioRing,
+    message_bus: MessageBus,
+    blocksize: int = BUFFER_BLOCKSIZE,
+    profiler: Optional[DSPProfiler] = None
 ) -> None:
     """
-    Play back a WAV file to the output device and send waveform data to the queue.
+    Play back a WAV file to the output device and send waveform data to the visualizer.
+
+    The file is streamed from a memory map, converting one block per callback,
+    so startup time and memory use do not grow with the file length.
 
     Parameters:
         output_idx (int): The output device index.
         out_ch (int): The number of output channels.
         wav_path (str): Path to the WAV file.
         stop_event (threading.Event): Event to signal stop.
-        waveform_queue (Any): Queue for waveform data.
+        waveform_ring (SharedAudioRing): Ring receiving the mono waveform for the visualizer.
+        blocksize (int): Frames per callback.
+        profiler (Optional[DSPProfiler]): Times the callbacks and plugin stages if given.
     """
     
     audio_processor =  AudioProcessor(stop_event=stop_event, message_bus=message_bus)
+    audio_processor.set_profiler(profiler)
     
     try:
-        wav_sr, data = wavfile.read(wav_path)
-        if data.dtype != np.float32:
-            # Convert to float32 in range [-1, 1]
-            if np.issubdtype(data.dtype, np.integer):
-                max_val = np.iinfo(data.dtype).max
-                data = data.astype(np.float32) / max_val
-            else:
-                data = data.astype(np.float32)
-        if data.ndim == 1:
-            data = data[:, np.newaxis]
-        if data.shape[1] < out_ch:
-            # Pad with zeros for missing channels
-            data = np.pad(data, ((0, 0), (0, out_ch - data.shape[1])))
-        elif data.shape[1] > out_ch:
-            data = data[:, :out_ch]
-        total_frames = data.shape[0]
-        frame_index = 0
+        source = WavSource(wav_path, out_ch)
+        wav_sr = source.samplerate
+        audio_processor.prepare(wav_sr, out_ch, blocksize)
+        # Converted samples for one callback, the stream always asks for blocksize frames
+        block = np.zeros((blocksize, out_ch), dtype=np.float32)
 
         def output_callback(outdata: np.ndarray, frames: int, time: Any, status: Any) -> None:
             if stop_event.is_set():
                 return
-            nonlocal frame_index
+            start = perf_counter_ns()
             if status:
                 logging.warning(f"Output stream status: {status}")
-            end = min(frame_index + frames, total_frames)
-            chunk = audio_processor.process_audio(data[frame_index:end])
-            out_len = end - frame_index
+            out_len = source.read_into(block[:frames])
+            chunk = audio_processor.process_audio(block[:out_len])
             if out_len < frames:
                 outdata[:out_len] = chunk
                 outdata[out_len:] = 0
@@ -251,19 +384,118 @@ def audio_playback(
             else:
                 outdata[:] = chunk
             # Send mono waveform to visualizer
-            mono = np.mean(chunk, axis=1) if chunk.shape[1] > 1 else chunk[:, 0]
-            waveform_queue.put(mono)
-            frame_index = end
+            waveform_ring.write_mono(chunk)
+            if profiler is not None:
+                profiler.record_block(start, frames, status)
 
         with sd.OutputStream(
             device=output_idx,
             channels=out_ch,
             samplerate=wav_sr,  # Use the WAV file's sample rate
-            blocksize=BUFFER_BLOCKSIZE,
+            blocksize=blocksize,
             callback=output_callback,
             latency='low'
         ):
-            while not stop_event.is_set() and frame_index < total_frames:
+            while not stop_event.is_set() and source.remaining > 0:
+                sd.sleep(100)
+    except Exception as e:
+        logging.error(f"Playback error: {e}")
+
+def audio_latency(
+    input_idx: int,
+    output_idx: int,
+    sr: int,
+    in_ch: int,
+    out_ch: int,
+    waveform_ring: SharedAudioRing,
+    stop_event: threading.Event,
+    trials: int = 10,
+    blocksize: int = BUFFER_BLOCKSIZE
+) -> None:
+    """
+    Measure the round-trip latency from output to input and log the results.
+
+    An MLS burst is played on every output channel once per trial and found
+    again in the input by cross-correlation, which needs a physical or
+    software loopback from the output to the input. The duplex stream's
+    frame count aligns input and output, so the burst's offset in the input
+    is the full round trip. The stream's own latency estimate and the
+    per-callback ADC and DAC times it reports are summarized alongside.
+
+    Parameters:
+        input_idx (int): The input device index.
+        output_idx (int): The output device index.
+        sr (int): The sample rate.
+        in_ch (int): The number of input channels.
+        out_ch (int): The number of output channels.
+        waveform_ring (SharedAudioRing): Ring receiving the recorded input for the visualizer.
+        stop_event (threading.Event): Event to signal stop, set once all trials are done.
+        trials (int): Number of bursts played.
+        blocksize (int): Frames per callback.
+    """
+    burst = make_mls()
+    # Each trial waits long enough for a half second round trip
+    period = burst.shape[0] + sr // 2
+    lead = sr // 2
+    starts = [lead + k * period for k in range(trials)]
+    total = lead + trials * period
+
+    played = np.zeros(total, dtype=np.float32)
+    for start in starts:
+        played[start:start + burst.shape[0]] = burst
+    recording = np.zeros(total, dtype=np.float32)
+
+    max_callbacks = total // blocksize + 2
+    dac_times = np.zeros(max_callbacks)
+    adc_times = np.zeros(max_callbacks)
+    callbacks = 0
+    frame_index = 0
+
+    def callback(indata: np.ndarray, outdata: np.ndarray, frames: int, time: Any, status: Any) -> None:
+        nonlocal callbacks, frame_index
+        if status:
+            logging.warning(f"Latency stream status: {status}")
+        n = max(0, min(frames, total - frame_index))
+        outdata[:n] = played[frame_index:frame_index + n, np.newaxis]
+        outdata[n:] = 0
+        np.mean(indata[:n], axis=1, out=recording[frame_index:frame_index + n])
+        waveform_ring.write_mono(indata)
+        if callbacks < max_callbacks:
+            dac_times[callbacks] = time.outputBufferDacTime - time.currentTime
+            adc_times[callbacks] = time.currentTime - time.inputBufferAdcTime
+            callbacks += 1
+        frame_index += n
+
+    # A duplex stream keeps input and output on one frame count. Whether it
+    # can span two devices depends on the host API
+    try:
+        with sd.Stream(
+            device=(input_idx, output_idx),
+            channels=(in_ch, out_ch),
+            samplerate=sr,
+            blocksize=blocksize,
+            callback=callback,
+            latency='low'
+        ) as stream:
+            reported = stream.latency
+            logging.info(f"Measuring round-trip latency over {trials} trials, {blocksize} frame blocks")
+            while not stop_event.is_set() and frame_index < total:
                 sd.sleep(100)
     except Exception as e:
-        logging.error(f"Playback error: {e}")
\ No newline at end of file
+        logging.error(f"Latency measurement error: {e}")
+        if input_idx != output_idx:
+            logging.error("The host API may not support a duplex stream across two devices, "
+                          "try one device with both input and output")
+        stop_event.set()
+        return
+
+    delays = measure_round_trips(recording[:frame_index], burst, starts, period)
+    logging.info(f"Reported stream latency: input {reported[0] * 1000:.2f} ms, output {reported[1] * 1000:.2f} ms, "
+                 f"round trip {(reported[0] + reported[1]) * 1000:.2f} ms")
+    logging.info(format_summary(f"Measured round trip ({delays.shape[0]}/{trials} bursts detected)",
+                                summarize_ms(delays / sr)))
+    logging.info(format_summary("Callback to DAC", summarize_ms(dac_times[:callbacks])))
+    logging.info(format_summary("ADC to callback", summarize_ms(adc_times[:callbacks])))
+    if delays.shape[0] < trials:
+        logging.warning("Some bursts were not detected, check that the output is looped back to the input")
+    stop_event.set()
@@ -1,64 +1,182 @@
 import logging
-from sounddevice import sleep
 from message_bus import *
 from signal_processing.amplifier import AmplifierPlugin
+from signal_processing.convolution_reverb import ConvolutionReverbPlugin
+from signal_processing.freeverb import FreeverbPlugin
+from signal_processing.plugin_chain import PluginChain
 from signal_processing.reverb import ReverbPlugin
-from threading import Thread, Lock 
-from typing import Any
-import numpy as np 
+from threading import Thread, Lock
+from typing import Any, Optional
+import numpy as np
+
+# Frames per audio callback unless --blocksize is given
+BUFFER_BLOCKSIZE = 4096
 
 class AudioProcessor():
-    def __init__(self, stop_event: Any, message_bus: MessageBus):
-        
+    def __init__(self, stop_event: Any = None, message_bus: Optional[MessageBus] = None):
+
         self.message_bus = message_bus
-        self.plugin_lock = Lock()
+        # Serialises parameter changes between control threads. The audio
+        # callback never takes it, it only reads published snapshots
+        self.control_lock = Lock()
         self.stop_event = stop_event
-        
+
         self.reverb = ReverbPlugin()
+        self.freeverb = FreeverbPlugin()
+        self.convolution_reverb = ConvolutionReverbPlugin()
         self.amplifier = AmplifierPlugin()
-        
-        self.do_reverb = False
-        self.do_amplification = False
-        
-        self.message_listener = Thread(target=self.read_message_bus)
-        self.message_listener.start()
-        
+
+        self.chain = PluginChain(
+            {
+                "reverb": self.reverb,
+                "freeverb": self.freeverb,
+                "convolution_reverb": self.convolution_reverb,
+                "amplifier": self.amplifier,
+            },
+            list(CHAIN_PLUGINS)
+        )
+
+        self.profiler = None
+
+        # Without a bus, e.g. offline rendering, settings are applied with apply_message()
+        self.message_listener = None
+        if message_bus is not None:
+            self.message_listener = Thread(target=self.read_message_bus)
+            self.message_listener.start()
+
     def read_message_bus(self):
         while not self.stop_event.is_set():
+            self.poll_parameters()
             message = self.message_bus.receive()
-            
+
             if message is None:
                 continue
-                
-            
-            if isinstance(message, ReverbSettingsMessage):
-                with self.plugin_lock:
-                    self.do_reverb = message.enabled
-                    self.reverb = ReverbPlugin(
-                        message.decay,
-                        message.delay_samps,
-                        message.wet_level,
-                        message.taps,
-                        message.allow_clipping,
-                        self.reverb
-                    )
-                    
-            if isinstance(message, AmplifierSettingsMessage):
-                with self.plugin_lock:
-                    self.do_amplification = message.enabled
-                    self.amplifier.set_allow_clipping(message.allow_clipping)
-                    self.amplifier.set_scale(message.scale)
-            
-        
-    def process_audio(self, input: np.ndarray):
-        with self.plugin_lock:
-            if self.do_reverb:
-                input = self.reverb.apply(input)
-            if self.do_amplification:
-                input = self.amplifier.apply(input)
+            self.apply_message(message)
+
+        logging.debug(f"Control messages coalesced before delivery: {self.message_bus.stats()}")
+        logging.debug(f"Parameter polls deferred by rate limiting: {self.message_bus.deferred_polls}")
+
+    def apply_message(self, message: Message) -> None:
+        """
+        Apply any control message, loading impulse responses before taking the lock.
+        Called from the listener thread, or directly when there is no bus.
 
-        return input
+        Parameters:
+            message (Message): A plugin settings or chain order message.
+        """
+        if isinstance(message, ConvolutionReverbSettingsMessage):
+            # Load the IR and precompute its spectra before taking the lock
+            loaded = None
+            if message.ir_path and message.ir_path != self.convolution_reverb.ir_path:
+                try:
+                    ir_sr, ir = ConvolutionReverbPlugin.load_ir(message.ir_path)
+                    convolver = None
+                    if self.convolution_reverb.prepared:
+                        convolver = self.convolution_reverb.build_convolver(ir_sr, ir)
+                    loaded = (message.ir_path, ir_sr, ir, convolver)
+                except Exception as e:
+                    logging.error(f"Failed to load impulse response {message.ir_path}: {e}")
+            with self.control_lock:
+                self.convolution_reverb.update_params(
+                    wet_level=message.wet_level,
+                    allow_clipping=message.allow_clipping
+                )
+                if loaded is not None:
+                    self.convolution_reverb.set_ir(*loaded)
+                self.chain.set_enabled("convolution_reverb", message.enabled)
 
+        elif isinstance(message, PluginChainMessage):
+            with self.control_lock:
+                self.chain.set_order(message.order)
 
+        else:
+            # Parameter messages normally arrive through shared memory,
+            # this covers a bus without a parameter block
+            with self.control_lock:
+                self.apply_parameters(message)
 
+    def apply_parameters(self, message: Message) -> None:
+        """
+        Publish the settings carried by a plugin parameter message.
 
+        Runs on a control thread, never the audio callback: plugin snapshots
+        and the chain's stages are replaced by reference, and the callback
+        picks them up at its next block. Must be called with control_lock held.
+
+        Parameters:
+            message (Message): A Reverb, Freeverb or Amplifier settings message.
+        """
+        if isinstance(message, ReverbSettingsMessage):
+            self.reverb.update_params(
+                decay=message.decay,
+                wet_level=message.wet_level,
+                allow_clipping=message.allow_clipping
+            )
+            # Builds any resized comb bank here, the audio thread swaps it in
+            self.reverb.set_delay(int(message.delay_samps), message.taps)
+            self.chain.set_enabled("reverb", message.enabled)
+
+        elif isinstance(message, FreeverbSettingsMessage):
+            self.freeverb.update_params(
+                room_size=message.room_size,
+                damping=message.damping,
+                wet_level=message.wet_level,
+                allow_clipping=message.allow_clipping
+            )
+            self.chain.set_enabled("freeverb", message.enabled)
+
+        elif isinstance(message, AmplifierSettingsMessage):
+            self.amplifier.update_params(
+                scale=message.scale,
+                allow_clipping=message.allow_clipping
+            )
+            self.chain.set_enabled("amplifier", message.enabled)
+
+    def poll_parameters(self) -> None:
+        """
+        Decode parameter changes written to the shared-memory block and
+        publish them as plugin snapshots. Called from the listener thread, so
+        the messages and snapshots are built there; the audio callback only
+        reads the snapshot references at its next block boundary.
+        """
+        if self.message_bus is None or not self.message_bus.parameters_changed():
+            return
+        with self.control_lock:
+            for message in self.message_bus.poll_parameters():
+                self.apply_parameters(message)
+
+    def set_profiler(self, profiler: Any) -> None:
+        """
+        Time the plugin stages into a profiler. Set before the stream starts.
+
+        Parameters:
+            profiler (Optional[DSPProfiler]): The profiler, or None to stop timing.
+        """
+        self.profiler = profiler
+        self.chain.set_profiler(profiler)
+
+    def prepare(self, sample_rate: int, channels: int, max_block_size: int) -> None:
+        """
+        Configure the plugin chain for the stream format before audio starts.
+
+        Parameters:
+            sample_rate (int): The stream sample rate.
+            channels (int): The number of channels in each processed block.
+            max_block_size (int): The largest block passed to process_audio.
+        """
+        with self.control_lock:
+            self.chain.prepare(sample_rate, channels, max_block_size)
+        if self.profiler is not None:
+            self.profiler.set_samplerate(sample_rate)
+
+    def reset(self) -> None:
+        """
+        Clear the state of every plugin, e.g. reverb tails. Only call while
+        the stream is stopped, plugin state is not guarded against the callback.
+        """
+        with self.control_lock:
+            self.chain.reset()
+
+    def process_audio(self, input: np.ndarray):
+        # Lock-free: the chain and plugins read their latest published snapshots
+        return self.chain.process(input)
@@ -0,0 +1,126 @@
+from typing import List
+
+import numpy as np
+
+
+class CombFilterBank:
+    """
+    Bank of feedback comb filters whose delay lines share one flat array.
+
+    Tap t of every channel lives in rows offsets[t]:offsets[t] + delays[t]
+    of `lines`, a frame-major (frames, channels) array like the blocks. All
+    channels of a tap share one circular read/write position, so a block is
+    processed with a handful of contiguous slice copies per tap covering
+    every channel at once, and never needs NumPy's iteration buffers.
+    """
+
+    def __init__(self, delays: List[int], channels: int, max_block_size: int) -> None:
+        """
+        Allocate zeroed delay lines for every tap and channel.
+
+        Parameters:
+            delays (List[int]): Delay length in samples of each tap.
+            channels (int): The number of audio channels.
+            max_block_size (int): The largest block passed to process().
+        """
+        self.delays = [int(delay) for delay in delays]
+        self.channels = channels
+        self.offsets = [0] * len(self.delays)
+        for tap in range(1, len(self.delays)):
+            self.offsets[tap] = self.offsets[tap - 1] + self.delays[tap - 1]
+        self.positions = [0] * len(self.delays)
+        self.lines = np.zeros((sum(self.delays), channels))
+
+        # Scratch reused across blocks. The float32 input is copied into _dry
+        # first, as arithmetic mixing dtypes makes NumPy allocate a cast buffer
+        self._dry = np.zeros((max_block_size, channels))
+        self._wet = np.zeros((max_block_size, channels))
+        self._feedback = np.zeros((max_block_size, channels))
+        self._wet_sum = np.zeros((max_block_size, channels))
+
+    def reset(self) -> None:
+        """
+        Silence every delay line.
+        """
+        self.lines[:] = 0
+        self.positions = [0] * len(self.delays)
+
+    def process(self, input: np.ndarray, decay: float) -> np.ndarray:
+        """
+        Run one block through every comb and return the summed wet signal.
+
+        Each tap reproduces the per-sample circular buffer behaviour of the
+        original reverb exactly: the wet signal is the buffer contents read
+        ahead of the write position, and positions written more than once in
+        a block (block longer than the delay) keep the last value written.
+
+        Parameters:
+            input (np.ndarray): Dry audio of shape (frames, channels).
+            decay (float): Feedback gain applied to the delayed signal.
+
+        Returns:
+            np.ndarray: Wet signal summed over taps, shape (frames, channels).
+                The array is scratch owned by the bank and is overwritten by
+                the next call.
+        """
+        block_len = input.shape[0]
+        dry = self._dry[:block_len]
+        dry[:] = input
+        wet = self._wet[:block_len]
+        feedback = self._feedback[:block_len]
+        wet_sum = self._wet_sum[:block_len]
+        wet_sum[:] = 0
+
+        for tap, delay in enumerate(self.delays):
+            line = self.lines[self.offsets[tap]:self.offsets[tap] + delay]
+            pos = self.positions[tap]
+
+            # Read the delayed signal, tiling the line if the block is longer
+            first = min(block_len, delay - pos)
+            wet[:first] = line[pos:pos + first]
+            for start in range(first, block_len, delay):
+                count = min(delay, block_len - start)
+                wet[start:start + count] = line[:count]
+            wet_sum += wet
+
+            # Feed input plus decayed delayed signal back into the line; only
+            # the newest `delay` samples of the block survive the wrap
+            np.multiply(wet, decay, out=feedback)
+            np.add(dry, feedback, out=feedback)
+            kept = min(block_len, delay)
+            write = (pos + block_len - kept) % delay
+            first = min(kept, delay - write)
+            line[write:write + first] = feedback[block_len - kept:block_len - kept + first]
+            line[:kept - first] = feedback[block_len - kept + first:]
+
+            self.positions[tap] = (pos + block_len) % delay
+
+        return wet_sum
+
+    def take_tail(self, previous: "CombFilterBank") -> None:
+        """
+        Carry on the reverb tail of the bank this freshly built, still silent
+        one replaces. Only slice copies into this bank's lines, so it is
+        cheap enough for the audio thread, which must call it at a block
+        boundary where `previous` is not being processed.
+
+        Each surviving tap keeps its most recent samples, the newest
+        min(old, new) of them, in playback order. Lines that grow are padded
+        with silence at the old end, new taps start silent and removed taps
+        are dropped.
+
+        Parameters:
+            previous (CombFilterBank): The bank in use until now, same channel count.
+        """
+        for tap in range(min(len(self.delays), len(previous.delays))):
+            old_delay = previous.delays[tap]
+            old_line = previous.lines[previous.offsets[tap]:previous.offsets[tap] + old_delay]
+            delay = self.delays[tap]
+            new_line = self.lines[self.offsets[tap]:self.offsets[tap] + delay]
+            kept = min(old_delay, delay)
+            # The old line read oldest-first starts at its position; copy its
+            # newest `kept` samples, which may wrap, to the end of the new line
+            start = (previous.positions[tap] + old_delay - kept) % old_delay
+            first = min(kept, old_delay - start)
+            new_line[delay - kept:delay - kept + first] = old_line[start:start + first]
+            new_line[delay - kept + first:] = old_line[:kept - first]
@@ -0,0 +1,251 @@
+import inspect
+import logging
+from fractions import Fraction
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+from scipy.signal import resample_poly
+
+from file_utils import load_wav
+from signal_processing.plugin import AudioPlugin, prevent_clipping
+
+# Matches BUFFER_BLOCKSIZE in audio_processor so callback blocks map onto whole partitions
+DEFAULT_PARTITION_SIZE = 4096
+# Smaller partitions make the spectral multiply-accumulate dominate for long IRs
+MIN_PARTITION_SIZE = 1024
+# NumPy 2.0 added out= to the FFT functions. Older versions return a new
+# array, which is copied into the preallocated buffer instead
+FFT_OUT = "out" in inspect.signature(np.fft.rfft).parameters
+
+
+def _rfft_into(x: np.ndarray, out: np.ndarray) -> None:
+    if FFT_OUT:
+        np.fft.rfft(x, axis=-1, out=out)
+    else:
+        np.copyto(out, np.fft.rfft(x, axis=-1))
+
+
+def _irfft_into(x: np.ndarray, n: int, out: np.ndarray) -> None:
+    if FFT_OUT:
+        np.fft.irfft(x, n=n, axis=-1, out=out)
+    else:
+        np.copyto(out, np.fft.irfft(x, n=n, axis=-1))
+
+
+class PartitionedConvolver:
+    """
+    Uniformly partitioned overlap-save FFT convolution engine.
+
+    The impulse response is split into partitions of `partition_size` samples
+    whose spectra are computed once. Each completed input partition is
+    transformed once and pushed onto a frequency-domain delay line, so the
+    per-block cost is one forward and one inverse FFT of 2 * partition_size
+    plus a complex multiply-accumulate across the stored spectra.
+
+    Blocks of any length are accepted with no added latency. A partially
+    filled partition is convolved zero-padded, which is exact for the samples
+    received so far, and redone once the partition completes.
+
+    Transforms are written into spectrum and time buffers allocated here, so
+    process() allocates no arrays (on NumPy before 2.0 each transform result
+    is a temporary that is copied in).
+    """
+
+    def __init__(self, ir: np.ndarray, partition_size: int, channels: int) -> None:
+        """
+        Precompute the partitioned impulse response spectra and allocate state.
+
+        Parameters:
+            ir (np.ndarray): Impulse response of shape (frames, ir_channels).
+                Audio channel i is convolved with IR channel i % ir_channels.
+            partition_size (int): Partition length in samples.
+            channels (int): The number of audio channels to convolve.
+        """
+        self.partition_size = partition_size
+        self.channels = channels
+        self.partitions = max(1, -(-ir.shape[0] // partition_size))
+        ir_channels = ir.shape[1]
+
+        padded = np.zeros((self.partitions * partition_size, ir_channels))
+        padded[:ir.shape[0]] = ir
+        # (partitions, ir_channels, partition_size) -> zero pad each to 2B and transform
+        segments = padded.reshape(self.partitions, partition_size, ir_channels).transpose(0, 2, 1)
+        ir_spectra = np.fft.rfft(segments, n=2 * partition_size, axis=-1)
+        self.spectra = np.ascontiguousarray(ir_spectra[:, np.arange(channels) % ir_channels])
+
+        bins = partition_size + 1
+        self._window = np.zeros((channels, 2 * partition_size))
+        # Latest partition, moved to the window's first half once it completes
+        self._history = np.zeros((channels, partition_size))
+        self._spectrum = np.zeros((channels, bins), dtype=self.spectra.dtype)
+        self._wet = np.zeros((channels, 2 * partition_size))
+        self._fill = 0
+        self._fdl = np.zeros((self.partitions, channels, bins), dtype=self.spectra.dtype)
+        self._head = 0
+        self._tail = np.zeros((channels, bins), dtype=self.spectra.dtype)
+        self._tail_part = np.zeros((channels, bins), dtype=self.spectra.dtype)
+
+    def reset(self) -> None:
+        """
+        Clear the input history and frequency-domain delay line.
+        """
+        self._window[:] = 0
+        self._fill = 0
+        self._fdl[:] = 0
+        self._head = 0
+        self._tail[:] = 0
+
+    def _update_tail(self) -> None:
+        # Contribution of every stored partition except the one in progress:
+        # slot (head - p) % P pairs with IR partition p for p = 1 .. P - 1
+        head = self._head
+        self._tail[:] = 0
+        if head > 0:
+            np.einsum('pcf,pcf->cf', self.spectra[1:head + 1], self._fdl[:head][::-1], out=self._tail_part)
+            self._tail += self._tail_part
+        if head < self.partitions - 1:
+            np.einsum('pcf,pcf->cf', self.spectra[head + 1:], self._fdl[head + 1:][::-1], out=self._tail_part)
+            self._tail += self._tail_part
+
+    def process(self, input: np.ndarray, output: np.ndarray) -> None:
+        """
+        Convolve one block of audio with the impulse response.
+
+        Parameters:
+            input (np.ndarray): Audio of shape (frames, channels).
+            output (np.ndarray): Receives the convolved (wet) signal, same shape.
+        """
+        block_len = input.shape[0]
+        size = self.partition_size
+        pos = 0
+        while pos < block_len:
+            count = min(size - self._fill, block_len - pos)
+            start = size + self._fill
+            self._window[:, start:start + count] = input[pos:pos + count].T
+            self._fill += count
+            complete = self._fill == size
+
+            spectrum = self._spectrum
+            _rfft_into(self._window, spectrum)
+            if complete:
+                # Partition complete: store its spectrum before it is reused
+                self._fdl[self._head] = spectrum
+            np.multiply(self.spectra[0], spectrum, out=spectrum)
+            spectrum += self._tail
+            wet = self._wet
+            _irfft_into(spectrum, 2 * size, wet)
+            output[pos:pos + count] = wet[:, start:start + count].T
+            pos += count
+
+            if complete:
+                self._head = (self._head + 1) % self.partitions
+                # Through a separate buffer, as a copy between the halves of
+                # one array makes NumPy allocate a temporary
+                self._history[:] = self._window[:, size:]
+                self._window[:, :size] = self._history
+                self._window[:, size:] = 0
+                self._fill = 0
+                self._update_tail()
+
+
+class ConvolutionReverbParams(NamedTuple):
+    wet_level: float
+    allow_clipping: bool
+
+
+class ConvolutionReverbPlugin(AudioPlugin):
+    def __init__(self, ir_path: Optional[str] = None, wet_level: float = 0.5, allow_clipping: bool = True):
+        super().__init__()
+        self.params = self.validate_params(ConvolutionReverbParams(wet_level, allow_clipping))
+        self.partition_size = DEFAULT_PARTITION_SIZE
+        self.ir_path = None
+        self.ir_sr = None
+        self.ir: Optional[np.ndarray] = None
+        self.convolver: Optional[PartitionedConvolver] = None
+        if ir_path:
+            ir_sr, ir = self.load_ir(ir_path)
+            self.set_ir(ir_path, ir_sr, ir, None)
+
+    @staticmethod
+    def load_ir(ir_path: str) -> Tuple[int, np.ndarray]:
+        """
+        Load an impulse response WAV normalised to unit energy per channel.
+
+        Normalising keeps the wet level comparable when swapping rooms.
+
+        Parameters:
+            ir_path (str): Path to the impulse response WAV file.
+
+        Returns:
+            Tuple[int, np.ndarray]: The IR sample rate and data (frames, channels).
+        """
+        ir_sr, ir = load_wav(ir_path)
+        ir = ir.astype(np.float64)
+        energy = np.sqrt(np.sum(ir ** 2, axis=0))
+        return ir_sr, ir / np.maximum(energy, 1e-12)
+
+    def build_convolver(self, ir_sr: int, ir: np.ndarray) -> PartitionedConvolver:
+        """
+        Resample an impulse response to the stream rate and precompute its spectra.
+
+        Must only be called once the plugin is prepared.
+
+        Parameters:
+            ir_sr (int): The IR sample rate.
+            ir (np.ndarray): Impulse response of shape (frames, channels).
+
+        Returns:
+            PartitionedConvolver: An engine sized for the prepared stream.
+        """
+        if ir_sr != self.sample_rate:
+            ratio = Fraction(self.sample_rate, ir_sr)
+            ir = resample_poly(ir, ratio.numerator, ratio.denominator, axis=0)
+        return PartitionedConvolver(ir, self.partition_size, self.channels)
+
+    def set_ir(self, ir_path: str, ir_sr: int, ir: np.ndarray, convolver: Optional[PartitionedConvolver]):
+        self.ir_path = ir_path
+        self.ir_sr = ir_sr
+        self.ir = ir
+        # The audio thread picks up the new engine at its next block
+        self.convolver = convolver
+        logging.info(f"Loaded impulse response {ir_path} ({ir_sr} Hz, {ir.shape[0]} frames)")
+
+    def prepare(self, sample_rate: int, channels: int, max_block_size: int):
+        super().prepare(sample_rate, channels, max_block_size)
+        # Whole callback blocks map onto whole partitions where possible
+        self.partition_size = max(max_block_size, MIN_PARTITION_SIZE)
+        # Same dtype as the blocks, so mixing it in needs no casting buffer
+        self.wet = np.zeros((max_block_size, channels), dtype=np.float32)
+        if self.ir is not None:
+            self.convolver = self.build_convolver(self.ir_sr, self.ir)
+
+    def reset(self):
+        super().reset()
+        if self.convolver is not None:
+            self.convolver.reset()
+
+    def validate_params(self, params: ConvolutionReverbParams) -> ConvolutionReverbParams:
+        return params._replace(wet_level=max(0.0, min(1.0, params.wet_level)))
+
+    def set_wet_level(self, wet_level: float):
+        self.update_params(wet_level=wet_level)
+
+    def set_allow_clipping(self, allow_clipping: bool):
+        self.update_params(allow_clipping=allow_clipping)
+
+    def process(self, input: np.ndarray, output: np.ndarray):
+        params = self.params
+        convolver = self.convolver
+        if convolver is None:
+            output[:] = input
+            return
+
+        block_len = input.shape[0]
+        wet = self.wet[:block_len]
+        convolver.process(input, wet)
+        wet *= params.wet_level
+        np.multiply(input, 1 - params.wet_level, out=output)
+        output += wet
+
+        if not params.allow_clipping:
+            prevent_clipping(output)
@@ -0,0 +1,94 @@
+from functools import lru_cache
+
+import numpy as np
+from scipy import sparse
+
+# Lowest frequency shown by the warped scales; lower bins are mostly DC and rumble
+MIN_FREQUENCY = 30.0
+
+
+def _hz_to_mel(frequency: np.ndarray) -> np.ndarray:
+    return 2595.0 * np.log10(1.0 + frequency / 700.0)
+
+
+def _mel_to_hz(mel: np.ndarray) -> np.ndarray:
+    return 700.0 * (10.0 ** (mel / 2595.0) - 1.0)
+
+
+def _triangular(bin_frequencies: np.ndarray, lower: np.ndarray, center: np.ndarray, upper: np.ndarray) -> sparse.csr_matrix:
+    # One triangle per row rising from lower to center and falling to upper,
+    # normalised so each row averages the magnitudes under it
+    rising = (bin_frequencies[None, :] - lower[:, None]) / np.maximum(center - lower, 1e-9)[:, None]
+    falling = (upper[:, None] - bin_frequencies[None, :]) / np.maximum(upper - center, 1e-9)[:, None]
+    weights = np.maximum(0.0, np.minimum(rising, falling))
+
+    # Bands narrower than the bin spacing fall back to the nearest bin
+    empty = weights.sum(axis=1) == 0
+    nearest = np.abs(bin_frequencies[None, :] - center[empty, None]).argmin(axis=1)
+    weights[np.flatnonzero(empty), nearest] = 1.0
+
+    weights /= weights.sum(axis=1, keepdims=True)
+    return sparse.csr_matrix(weights.astype(np.float32))
+
+
+@lru_cache(maxsize=32)
+def build_filterbank(kind: str, samplerate: int, nfft: int, rows: int) -> sparse.csr_matrix:
+    """
+    Build the sparse matrix mapping rfft magnitude bins to display rows.
+
+    Cached per argument set, so switching scales or resolutions back and
+    forth never rebuilds a matrix.
+
+    Parameters:
+        kind (str): "log" for log-spaced triangles between adjacent centres,
+            "mel" for a mel-spaced triangular bank, or "cq" for
+            constant-Q bands whose width is proportional to their centre.
+        samplerate (int): The audio sample rate.
+        nfft (int): FFT frame length; the matrix takes nfft // 2 bins.
+        rows (int): Number of display rows, lowest frequency first.
+
+    Returns:
+        sparse.csr_matrix: Matrix of shape (rows, nfft // 2).
+    """
+    bin_frequencies = np.arange(nfft // 2) * samplerate / nfft
+    nyquist = samplerate / 2
+
+    if kind == "mel":
+        edges = _mel_to_hz(np.linspace(_hz_to_mel(np.array(0.0)), _hz_to_mel(np.array(nyquist)), rows + 2))
+        return _triangular(bin_frequencies, edges[:-2], edges[1:-1], edges[2:])
+
+    if kind == "log":
+        edges = np.geomspace(MIN_FREQUENCY, nyquist, rows + 2)
+        return _triangular(bin_frequencies, edges[:-2], edges[1:-1], edges[2:])
+
+    if kind == "cq":
+        centers = np.geomspace(MIN_FREQUENCY, nyquist, rows)
+        bins_per_octave = (rows - 1) / np.log2(nyquist / MIN_FREQUENCY)
+        # Constant Q: each band spans one step either side of its centre
+        step = 2.0 ** (1.0 / bins_per_octave)
+        return _triangular(bin_frequencies, centers / step, centers, centers * step)
+
+    raise ValueError(f"Unknown filterbank kind: {kind}")
+
+
+def row_frequencies(kind: str, samplerate: int, nfft: int, rows: int) -> np.ndarray:
+    """
+    Centre frequency of each display row of a filterbank.
+
+    Parameters:
+        kind (str): Filterbank kind, as for build_filterbank.
+        samplerate (int): The audio sample rate.
+        nfft (int): FFT frame length.
+        rows (int): Number of display rows.
+
+    Returns:
+        np.ndarray: Frequencies in Hz, lowest first.
+    """
+    nyquist = samplerate / 2
+    if kind == "mel":
+        return _mel_to_hz(np.linspace(_hz_to_mel(np.array(0.0)), _hz_to_mel(np.array(nyquist)), rows + 2))[1:-1]
+    if kind == "log":
+        return np.geomspace(MIN_FREQUENCY, nyquist, rows + 2)[1:-1]
+    if kind == "cq":
+        return np.geomspace(MIN_FREQUENCY, nyquist, rows)
+    raise ValueError(f"Unknown filterbank kind: {kind}")
@@ -0,0 +1,183 @@
+from typing import NamedTuple
+
+import numpy as np
+
+from signal_processing.plugin import AudioPlugin, prevent_clipping
+
+# Freeverb tunings in samples at 44.1 kHz
+COMB_TUNINGS = [1116, 1188, 1277, 1356, 1422, 1491, 1557, 1617]
+ALLPASS_TUNINGS = [556, 441, 341, 225]
+TUNING_SAMPLE_RATE = 44100
+
+FIXED_GAIN = 0.015
+SCALE_WET = 3.0
+SCALE_DAMP = 0.4
+SCALE_ROOM = 0.28
+OFFSET_ROOM = 0.7
+ALLPASS_FEEDBACK = 0.5
+# Damping scan steps stop once the carried weight no longer registers in float32
+SCAN_CUTOFF = float(np.finfo(np.float32).tiny)
+
+
+class FreeverbParams(NamedTuple):
+    room_size: float
+    damping: float
+    wet_level: float
+    allow_clipping: bool
+    # Derived from room_size and damping when the snapshot is published
+    feedback: float = 0.0
+    damp: float = 0.0
+
+
+class FreeverbPlugin(AudioPlugin):
+    """
+    Schroeder/Moorer reverb in the Freeverb layout: eight parallel lowpass
+    feedback combs summed into four series allpass diffusers.
+
+    Every delay line is a float32 (delay, channels) array allocated in
+    prepare(), with lengths scaled to the stream sample rate. A block
+    is processed in runs no longer than the delay line being updated, so each
+    run reads samples written at least one full delay earlier and can be done
+    with whole-array operations instead of a per-sample loop. The one-pole
+    damping filter inside each comb loop is evaluated as a log-step scan in
+    preallocated buffers, carrying its last output across runs.
+
+    Lines and scratch are frame-major like the blocks themselves, so every
+    run is a contiguous slice. Arithmetic between differently strided views
+    makes NumPy allocate iteration buffers, which this layout never needs.
+    """
+
+    def __init__(self, room_size: float = 0.5, damping: float = 0.5, wet_level: float = 0.3, allow_clipping: bool = True):
+        super().__init__()
+        self.params = self.validate_params(FreeverbParams(room_size, damping, wet_level, allow_clipping))
+
+    def prepare(self, sample_rate: int, channels: int, max_block_size: int):
+        super().prepare(sample_rate, channels, max_block_size)
+        scale = sample_rate / TUNING_SAMPLE_RATE
+        self.comb_delays = [max(1, int(tuning * scale)) for tuning in COMB_TUNINGS]
+        self.allpass_delays = [max(1, int(tuning * scale)) for tuning in ALLPASS_TUNINGS]
+
+        self.comb_lines = [np.zeros((delay, channels), dtype=np.float32) for delay in self.comb_delays]
+        self.comb_positions = [0] * len(self.comb_delays)
+        # Last output of each comb's damping filter, one row per comb
+        self.comb_filter_state = np.zeros((len(self.comb_delays), channels), dtype=np.float32)
+        self.allpass_lines = [np.zeros((delay, channels), dtype=np.float32) for delay in self.allpass_delays]
+        self.allpass_positions = [0] * len(self.allpass_delays)
+        self._allpass_scratch = np.zeros((max(self.allpass_delays), channels), dtype=np.float32)
+
+        # Runs never exceed the longest comb delay or the block
+        run = min(max(self.comb_delays), max_block_size)
+        self._damped = np.zeros((run, channels), dtype=np.float32)
+        self._scan = np.zeros((run, channels), dtype=np.float32)
+
+        self._comb_input = np.zeros((max_block_size, channels), dtype=np.float32)
+        self._wet = np.zeros((max_block_size, channels), dtype=np.float32)
+
+    def reset(self):
+        super().reset()
+        if not self.prepared:
+            return
+        for line in self.comb_lines + self.allpass_lines:
+            line[:] = 0
+        self.comb_filter_state[:] = 0
+        self.comb_positions = [0] * len(self.comb_delays)
+        self.allpass_positions = [0] * len(self.allpass_delays)
+
+    def validate_params(self, params: FreeverbParams) -> FreeverbParams:
+        room_size = max(0.0, min(1.0, params.room_size))
+        damping = max(0.0, min(1.0, params.damping))
+        damp = damping * SCALE_DAMP
+        return params._replace(
+            room_size=room_size,
+            damping=damping,
+            wet_level=max(0.0, min(1.0, params.wet_level)),
+            feedback=room_size * SCALE_ROOM + OFFSET_ROOM,
+            damp=damp,
+        )
+
+    def set_room_size(self, room_size: float):
+        self.update_params(room_size=room_size)
+
+    def set_damping(self, damping: float):
+        self.update_params(damping=damping)
+
+    def set_wet_level(self, wet_level: float):
+        self.update_params(wet_level=wet_level)
+
+    def set_allow_clipping(self, allow_clipping: bool):
+        self.update_params(allow_clipping=allow_clipping)
+
+    def _damp(self, delayed: np.ndarray, damp: float, state: np.ndarray, out: np.ndarray) -> None:
+        # fs[n] = (1 - damp) * x[n] + damp * fs[n - 1], with fs[-1] = state.
+        # Each doubling step adds the sum shifted by `shift` samples, weighted
+        # by damp ** shift, so log2(run) whole-array passes replace the loop
+        count = delayed.shape[0]
+        np.multiply(delayed, 1.0 - damp, out=out)
+        scan = self._scan
+        np.multiply(state, damp, out=scan[0])
+        out[0] += scan[0]
+        shift = 1
+        weight = damp
+        while shift < count and weight > SCAN_CUTOFF:
+            carried = scan[:count - shift]
+            np.multiply(out[:count - shift], weight, out=carried)
+            out[shift:] += carried
+            shift *= 2
+            weight *= weight
+        state[:] = out[count - 1]
+
+    def _run_combs(self, params: FreeverbParams, comb_input: np.ndarray, wet: np.ndarray) -> None:
+        block_len = comb_input.shape[0]
+        wet[:] = 0
+        for comb, line in enumerate(self.comb_lines):
+            delay = self.comb_delays[comb]
+            pos = self.comb_positions[comb]
+            start = 0
+            while start < block_len:
+                # Stop each run at the block end or the ring wrap, never past one delay
+                count = min(block_len - start, delay - pos)
+                delayed = line[pos:pos + count]
+                wet[start:start + count] += delayed
+                damped = self._damped[:count]
+                self._damp(delayed, params.damp, self.comb_filter_state[comb], damped)
+                np.multiply(damped, params.feedback, out=delayed)
+                delayed += comb_input[start:start + count]
+                pos = (pos + count) % delay
+                start += count
+            self.comb_positions[comb] = pos
+
+    def _run_allpasses(self, signal: np.ndarray) -> None:
+        block_len = signal.shape[0]
+        for stage, line in enumerate(self.allpass_lines):
+            delay = self.allpass_delays[stage]
+            pos = self.allpass_positions[stage]
+            start = 0
+            while start < block_len:
+                count = min(block_len - start, delay - pos)
+                delayed = self._allpass_scratch[:count]
+                delayed[:] = line[pos:pos + count]
+                chunk = signal[start:start + count]
+                # line <- x + fb * delayed, y <- delayed - x
+                np.multiply(delayed, ALLPASS_FEEDBACK, out=line[pos:pos + count])
+                line[pos:pos + count] += chunk
+                np.subtract(delayed, chunk, out=chunk)
+                pos = (pos + count) % delay
+                start += count
+            self.allpass_positions[stage] = pos
+
+    def process(self, input: np.ndarray, output: np.ndarray):
+        params = self.params
+        block_len = input.shape[0]
+        comb_input = self._comb_input[:block_len]
+        wet = self._wet[:block_len]
+
+        np.multiply(input, FIXED_GAIN, out=comb_input)
+        self._run_combs(params, comb_input, wet)
+        self._run_allpasses(wet)
+
+        wet *= params.wet_level * SCALE_WET
+        np.multiply(input, 1 - params.wet_level, out=output)
+        output += wet
+
+        if not params.allow_clipping:
+            prevent_clipping(output)
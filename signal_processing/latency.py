@@ -0,0 +1,105 @@
+from typing import Dict, List
+
+import numpy as np
+from scipy.signal import correlate, max_len_seq
+
+# MLS order, 2**order - 1 samples per burst
+MLS_ORDER = 14
+# Level of the test burst, kept well below full scale
+MLS_LEVEL = 0.25
+# A correlation peak must stand this far above the median to count as detected
+DETECTION_RATIO = 8.0
+
+
+def make_mls(order: int = MLS_ORDER, level: float = MLS_LEVEL) -> np.ndarray:
+    """
+    Generate a maximum length sequence burst.
+
+    Parameters:
+        order (int): Sequence order, the burst is 2**order - 1 samples.
+        level (float): Peak amplitude of the burst.
+
+    Returns:
+        np.ndarray: The float32 burst of +level and -level samples.
+    """
+    sequence = max_len_seq(order)[0].astype(np.float32)
+    return (sequence * 2 - 1) * level
+
+
+def find_delay(recording: np.ndarray, burst: np.ndarray) -> int:
+    """
+    Find where a burst starts in a recording by cross-correlation.
+
+    Parameters:
+        recording (np.ndarray): 1-D recording expected to contain the burst.
+        burst (np.ndarray): The burst that was played.
+
+    Returns:
+        int: Offset of the burst in samples, or -1 if it was not detected.
+    """
+    if recording.shape[0] < burst.shape[0]:
+        return -1
+    corr = np.abs(correlate(recording, burst, mode='valid', method='fft'))
+    peak = int(np.argmax(corr))
+    if corr[peak] < DETECTION_RATIO * (np.median(corr) + 1e-12):
+        return -1
+    return peak
+
+
+def summarize_ms(values: np.ndarray) -> Dict[str, float]:
+    """
+    Summarize a set of durations.
+
+    Parameters:
+        values (np.ndarray): Durations in seconds.
+
+    Returns:
+        Dict[str, float]: Minimum, median, 95th percentile and maximum in milliseconds.
+    """
+    if values.shape[0] == 0:
+        return {}
+    ms = values * 1000
+    return {
+        "min": float(ms.min()),
+        "median": float(np.median(ms)),
+        "p95": float(np.percentile(ms, 95)),
+        "max": float(ms.max()),
+    }
+
+
+def format_summary(name: str, summary: Dict[str, float]) -> str:
+    """
+    Format a summary from summarize_ms as one log line.
+
+    Parameters:
+        name (str): What was measured.
+        summary (Dict[str, float]): The summary.
+
+    Returns:
+        str: The formatted line.
+    """
+    if not summary:
+        return f"{name}: no data"
+    return f"{name}: " + ", ".join(f"{key} {value:.2f} ms" for key, value in summary.items())
+
+
+def measure_round_trips(recording: np.ndarray, burst: np.ndarray, starts: List[int], period: int) -> np.ndarray:
+    """
+    Measure the round trip of every burst in a recording.
+
+    Parameters:
+        recording (np.ndarray): 1-D input recorded while the bursts played,
+            aligned to the output stream's frame count.
+        burst (np.ndarray): The burst that was played.
+        starts (List[int]): Output frame at which each burst started.
+        period (int): Frames searched after each start.
+
+    Returns:
+        np.ndarray: Round trip of each detected burst in samples.
+    """
+    delays = []
+    for start in starts:
+        delay = find_delay(recording[start:start + period], burst)
+        if delay >= 0:
+            delays.append(delay)
+    return np.array(delays, dtype=np.int64)
@@ -0,0 +1,359 @@
+import glob
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy.io.wavfile import write
+
+from file_utils import WavSource
+from message_bus import (
+    AmplifierSettingsMessage,
+    ConvolutionReverbSettingsMessage,
+    FreeverbSettingsMessage,
+    Message,
+    PluginChainMessage,
+    ReverbSettingsMessage,
+)
+from signal_processing.audio_processor import AudioProcessor
+
+# Settings file sections, keyed like CHAIN_PLUGINS, and the message each one becomes
+SETTINGS_MESSAGES: Dict[str, type] = {
+    "reverb": ReverbSettingsMessage,
+    "freeverb": FreeverbSettingsMessage,
+    "convolution_reverb": ConvolutionReverbSettingsMessage,
+    "amplifier": AmplifierSettingsMessage,
+}
+
+
+def load_settings(settings_path: Optional[str]) -> List[Message]:
+    """
+    Read plugin settings from a JSON file.
+
+    The file holds an optional "order" list of plugin keys and one object per
+    plugin, keyed as in CHAIN_PLUGINS, with the fields of that plugin's
+    settings message, e.g. {"amplifier": {"scale": 0.5, "enabled": true,
+    "allow_clipping": false}}.
+
+    Parameters:
+        settings_path (Optional[str]): Path to the settings file. No settings if None.
+
+    Returns:
+        List[Message]: The chain order message, if any, then one message per plugin.
+    """
+    if settings_path is None:
+        return []
+    with open(settings_path, "r") as fh:
+        settings = json.load(fh)
+
+    messages: List[Message] = []
+    if "order" in settings:
+        messages.append(PluginChainMessage(list(settings["order"])))
+    for key, fields in settings.items():
+        if key == "order":
+            continue
+        if key not in SETTINGS_MESSAGES:
+            raise ValueError(f"Unknown plugin in settings file: {key}")
+        try:
+            messages.append(SETTINGS_MESSAGES[key](**fields))
+        except TypeError as e:
+            raise ValueError(f"Bad settings for {key}: {e}") from e
+    return messages
+
+
+def render(audio_processor: AudioProcessor, source: WavSource, blocksize: int) -> np.ndarray:
+    """
+    Stream a WAV source through a prepared processor in blocks of blocksize
+    frames, exactly as the playback callback feeds it.
+
+    Parameters:
+        audio_processor (AudioProcessor): Processor prepared for the source's format.
+        source (WavSource): Input audio, read from its current position to the end.
+        blocksize (int): Frames per block, the last block may be shorter.
+
+    Returns:
+        np.ndarray: The processed audio (frames, channels).
+    """
+    output = np.empty((source.remaining, source.channels), dtype=np.float32)
+    block = np.empty((blocksize, source.channels), dtype=np.float32)
+    start = 0
+    while True:
+        n = source.read_into(block)
+        if n == 0:
+            return output
+        output[start:start + n] = audio_processor.process_audio(block[:n])
+        start += n
+
+
+def render_file(
+    input_path: str,
+    output_path: str,
+    settings: List[Message],
+    blocksize: int,
+    channels: Optional[int] = None
+) -> Tuple[int, int]:
+    """
+    Render one WAV file through a fresh plugin chain and write the result as
+    32-bit float, so no precision is lost to requantization.
+
+    Parameters:
+        input_path (str): Path to the input WAV file.
+        output_path (str): Path of the WAV file to write.
+        settings (List[Message]): Settings applied before the first block.
+        blocksize (int): Frames per block.
+        channels (Optional[int]): Pad or truncate to this many channels. Keeps
+            the file's channel count if None.
+
+    Returns:
+        Tuple[int, int]: The number of frames rendered and the sample rate.
+    """
+    source = WavSource(input_path, channels)
+    audio_processor = AudioProcessor()
+    audio_processor.prepare(source.samplerate, source.channels, blocksize)
+    for message in settings:
+        audio_processor.apply_message(message)
+    output = render(audio_processor, source, blocksize)
+    source.close()
+    write(output_path, source.samplerate, output)
+    return source.frames, source.samplerate
+
+
+# Per-process state of batch render workers, see _init_worker
+_worker_processor: Optional[AudioProcessor] = None
+_worker_format: Optional[Tuple[int, int]] = None
+_worker_blocksize = 0
+_worker_channels: Optional[int] = None
+
+
+def _init_worker(settings: List[Message], blocksize: int, channels: Optional[int]) -> None:
+    # Each worker process builds one chain, loads its settings (and any IR)
+    # once, and reuses it for every file it is handed
+    global _worker_processor, _worker_format, _worker_blocksize, _worker_channels
+    _worker_processor = AudioProcessor()
+    for message in settings:
+        _worker_processor.apply_message(message)
+    _worker_format = None
+    _worker_blocksize = blocksize
+    _worker_channels = channels
+
+
+def _render_task(input_path: str, output_path: str) -> float:
+    # Render one file in a worker process, returning the seconds of audio rendered
+    global _worker_format
+    source = WavSource(input_path, _worker_channels)
+    audio_format = (source.samplerate, source.channels)
+    if audio_format != _worker_format:
+        _worker_processor.prepare(source.samplerate, source.channels, _worker_blocksize)
+        _worker_format = audio_format
+    # No tail from the previous file may leak into this one
+    _worker_processor.reset()
+    output = render(_worker_processor, source, _worker_blocksize)
+    source.close()
+    write(output_path, source.samplerate, output)
+    return source.frames / source.samplerate
+
+
+def find_inputs(pattern: str) -> List[str]:
+    """
+    Expand a directory or glob pattern into the WAV files to render. Earlier
+    render outputs, named by default_output_path, are skipped.
+
+    Parameters:
+        pattern (str): A directory, whose .wav files are taken, or a glob pattern.
+
+    Returns:
+        List[str]: The matching files, sorted.
+    """
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, "*.wav")
+    return sorted(
+        path for path in glob.glob(pattern, recursive=True)
+        if os.path.isfile(path) and not path.endswith("_rendered.wav")
+    )
+
+
+def pattern_base(pattern: str) -> str:
+    """
+    Return the folder a directory or glob pattern starts from: the directory
+    itself, or the leading path components before the first wildcard.
+
+    Parameters:
+        pattern (str): A directory or glob pattern, as given to find_inputs.
+
+    Returns:
+        str: The base folder, "." if the pattern starts with a wildcard.
+    """
+    if os.path.isdir(pattern):
+        return pattern
+    parts = []
+    for part in Path(pattern).parts:
+        if glob.has_magic(part):
+            break
+        parts.append(part)
+    else:
+        # A plain file path, its folder is the base
+        parts = parts[:-1]
+    return str(Path(*parts)) if parts else "."
+
+
+def batch_output_path(input_path: str, base: str, output_dir: Optional[str]) -> str:
+    """
+    Return where batch mode writes a rendered file. Under an output directory
+    the input's path relative to the pattern base is kept, so files with the
+    same name in different folders do not overwrite each other.
+
+    Parameters:
+        input_path (str): Path to the input WAV file.
+        base (str): The pattern's base folder, see pattern_base.
+        output_dir (Optional[str]): Directory for the rendered files. The
+            file is written next to its input if None.
+
+    Returns:
+        str: The output path.
+    """
+    if output_dir is None:
+        return default_output_path(input_path)
+    relative = Path(os.path.relpath(input_path, base))
+    return str(Path(output_dir) / relative.with_name(f"{relative.stem}_rendered.wav"))
+
+
+def available_cores() -> int:
+    """
+    Return the number of CPU cores this process may run on.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def default_output_path(input_path: str) -> str:
+    """
+    Return the output path used when none is given: next to the input, with
+    "_rendered" added to the name.
+
+    Parameters:
+        input_path (str): Path to the input WAV file.
+
+    Returns:
+        str: The output path.
+    """
+    path = Path(input_path)
+    return str(path.with_name(f"{path.stem}_rendered.wav"))
+
+
+def audio_render(
+    wav_path: str,
+    output_path: Optional[str],
+    settings_path: Optional[str],
+    blocksize: int,
+    channels: Optional[int] = None
+) -> None:
+    """
+    Render a WAV file offline, with no audio device, and report the realtime factor.
+
+    Parameters:
+        wav_path (str): Path to the input WAV file.
+        output_path (Optional[str]): Path of the WAV file to write. Defaults
+            to the input name with "_rendered" added.
+        settings_path (Optional[str]): JSON plugin settings, see load_settings.
+        blocksize (int): Frames per block.
+        channels (Optional[int]): Pad or truncate to this many channels.
+    """
+    output_path = output_path or default_output_path(wav_path)
+    settings = load_settings(settings_path)
+    start = time.perf_counter()
+    frames, wav_sr = render_file(wav_path, output_path, settings, blocksize, channels)
+    elapsed = time.perf_counter() - start
+    seconds = frames / wav_sr
+    logging.info(
+        f"Rendered {seconds:.2f} s of audio to {output_path} in {elapsed:.2f} s "
+        f"({seconds / max(elapsed, 1e-9):.1f}x realtime, {blocksize} frame blocks)"
+    )
+
+
+def audio_batch_render(
+    pattern: str,
+    output_dir: Optional[str],
+    settings_path: Optional[str],
+    blocksize: int,
+    channels: Optional[int] = None,
+    workers: Optional[int] = None
+) -> bool:
+    """
+    Render many WAV files with the same settings across a process pool,
+    logging progress, every failure and the overall throughput.
+
+    Parameters:
+        pattern (str): A directory or glob pattern of input WAV files.
+        output_dir (Optional[str]): Directory for the rendered files, created
+            if needed, keeping each input's path relative to the pattern's
+            base folder. Each file is written next to its input if None.
+        settings_path (Optional[str]): JSON plugin settings, see load_settings.
+        blocksize (int): Frames per block.
+        channels (Optional[int]): Pad or truncate to this many channels.
+        workers (Optional[int]): Worker processes, one per available core if None.
+
+    Returns:
+        bool: True if every file rendered.
+    """
+    inputs = find_inputs(pattern)
+    if not inputs:
+        logging.error(f"No WAV files match {pattern}")
+        return False
+    # Parsed here first so a bad settings file fails once, not in every worker
+    settings = load_settings(settings_path)
+    base = pattern_base(pattern)
+    workers = min(workers or available_cores(), len(inputs))
+    logging.info(f"Rendering {len(inputs)} files on {workers} workers")
+
+    failures: Dict[str, str] = {}
+    # Output path of each input. Two inputs never share one, as two workers
+    # writing the same file at once would leave one result silently missing
+    outputs: Dict[str, str] = {}
+    claimed: Dict[str, str] = {}
+    for input_path in inputs:
+        output_path = batch_output_path(input_path, base, output_dir)
+        key = os.path.normcase(os.path.abspath(output_path))
+        if key in claimed:
+            failures[input_path] = f"Output {output_path} is also the output of {claimed[key]}"
+            logging.warning(f"{input_path} skipped: {failures[input_path]}")
+            continue
+        claimed[key] = input_path
+        outputs[input_path] = output_path
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+
+    audio_seconds = 0.0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(settings, blocksize, channels)
+    ) as executor:
+        futures = {
+            executor.submit(_render_task, input_path, output_path): input_path
+            for input_path, output_path in outputs.items()
+        }
+
+        for done, future in enumerate(as_completed(futures), start=len(failures) + 1):
+            input_path = futures[future]
+            try:
+                audio_seconds += future.result()
+                logging.info(f"[{done}/{len(inputs)}] {input_path}")
+            except Exception as e:
+                failures[input_path] = f"{type(e).__name__}: {e}"
+                logging.warning(f"[{done}/{len(inputs)}] {input_path} failed: {failures[input_path]}")
+
+    elapsed = time.perf_counter() - start
+    logging.info(
+        f"Rendered {len(inputs) - len(failures)}/{len(inputs)} files, {audio_seconds:.1f} s of audio "
+        f"in {elapsed:.1f} s ({audio_seconds / max(elapsed, 1e-9):.1f} audio s per wall s)"
+    )
+    if failures:
+        logging.error(f"{len(failures)} files failed:")
+        for input_path, error in failures.items():
+            logging.error(f"  {input_path}: {error}")
+    return not failures
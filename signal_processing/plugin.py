@@ -0,0 +1,109 @@
+from abc import ABC, abstractmethod
+from typing import Any
+
+import numpy as np
+
+
+class AudioPlugin(ABC):
+    """
+    Base class for the audio effect plugins run by the AudioProcessor.
+
+    Lifecycle:
+        prepare() receives the stream format before any audio is processed and
+        again whenever the format changes. Plugins allocate every buffer they
+        need there.
+        process() reads one block of at most max_block_size frames, with the
+        channel count given to prepare(), and writes the result into the
+        output buffer it is handed. Only buffers allocated in prepare() are
+        used, and no array is created per block: results go to buffers with
+        out= or slice assignment, and operands share one memory layout and
+        dtype so NumPy needs no temporaries of its own. Input and output are
+        never the same array.
+        reset() clears internal state such as delay lines and filter memories
+        without reallocating.
+
+    Parameters live in `params`, an immutable NamedTuple snapshot. The control
+    thread builds a replacement with update_params() and publishes it with a
+    single reference assignment, which is atomic under the GIL. process() reads
+    `self.params` once at the start of each block, so it always sees one
+    complete parameter set and never waits on the control thread.
+    """
+
+    params: Any
+
+    def __init__(self) -> None:
+        self.sample_rate = 0
+        self.channels = 0
+        self.max_block_size = 0
+
+    @property
+    def prepared(self) -> bool:
+        return self.channels > 0
+
+    def prepare(self, sample_rate: int, channels: int, max_block_size: int) -> None:
+        """
+        Configure the plugin for a stream format and preallocate its buffers.
+
+        Parameters:
+            sample_rate (int): The stream sample rate.
+            channels (int): The number of audio channels per block.
+            max_block_size (int): The largest number of frames passed to process().
+        """
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.max_block_size = max_block_size
+
+    def reset(self) -> None:
+        """
+        Clear all processing state.
+        """
+        pass
+
+    def update_params(self, **changes: Any) -> None:
+        """
+        Publish a new parameter snapshot with the given fields changed.
+
+        Only the control thread may call this; it is the single writer.
+
+        Parameters:
+            **changes (Any): Snapshot fields to replace.
+        """
+        self.params = self.validate_params(self.params._replace(**changes))
+
+    def validate_params(self, params: Any) -> Any:
+        """
+        Clamp or derive snapshot fields before publishing (override as needed).
+
+        Parameters:
+            params (Any): The candidate snapshot.
+
+        Returns:
+            Any: The snapshot to publish.
+        """
+        return params
+
+    @abstractmethod
+    def process(self, input: np.ndarray, output: np.ndarray) -> None:
+        """
+        Process one block of audio.
+
+        Parameters:
+            input (np.ndarray): Audio of shape (frames, channels).
+            output (np.ndarray): Buffer of the same shape receiving the result.
+        """
+
+
+def prevent_clipping(output: np.ndarray) -> np.ndarray:
+    """
+    Scale a block in place so its peak does not exceed 1.0.
+
+    Parameters:
+        output (np.ndarray): The block to limit.
+
+    Returns:
+        np.ndarray: The same array, for chaining.
+    """
+    if output.size:
+        peak = max(1.0, output.max(), -output.min())
+        output /= peak
+    return output
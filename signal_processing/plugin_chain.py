@@ -0,0 +1,144 @@
+from time import perf_counter_ns
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from signal_processing.plugin import AudioPlugin
+
+
+class PluginChain:
+    """
+    Ordered, reconfigurable chain of plugins processed through two
+    preallocated ping-pong buffers.
+
+    Each active stage reads the previous stage's output and writes into the
+    other buffer, so a block passes through any number of stages without
+    allocating. A stage runs only when it is both in the chain order and
+    enabled, letting the GUI toggle plugins without disturbing their position.
+
+    Order and enable changes come from the control thread. They rebuild the
+    `stages` tuple off to the side and publish it with one reference
+    assignment, so process() picks up a consistent stage list at the start of
+    each block without locking.
+    """
+
+    def __init__(self, plugins: Dict[str, AudioPlugin], order: List[str]) -> None:
+        """
+        Initialize the chain with the available plugins and their order.
+
+        Parameters:
+            plugins (Dict[str, AudioPlugin]): Every plugin the chain may run, by key.
+            order (List[str]): Keys of the plugins in the chain, first stage first.
+        """
+        self.plugins = plugins
+        self.enabled = {key: False for key in plugins}
+        self.order: List[str] = []
+        self.stages: Tuple[AudioPlugin, ...] = ()
+        self.set_order(order)
+        self.max_block_size = 0
+        self._buffers = np.zeros((2, 0, 0), dtype=np.float32)
+        self.profiler: Optional[Any] = None
+        self._profile_slots: Dict[AudioPlugin, int] = {}
+
+    def set_profiler(self, profiler: Optional[Any]) -> None:
+        """
+        Time every stage into a profiler, or stop timing with None.
+
+        Parameters:
+            profiler (Optional[DSPProfiler]): Receives each stage's run time.
+        """
+        if profiler is not None:
+            self._profile_slots = {plugin: profiler.stage_slot(key) for key, plugin in self.plugins.items()}
+        self.profiler = profiler
+
+    def prepare(self, sample_rate: int, channels: int, max_block_size: int) -> None:
+        """
+        Allocate the ping-pong buffers and prepare every plugin.
+
+        Parameters:
+            sample_rate (int): The stream sample rate.
+            channels (int): The number of channels in each block.
+            max_block_size (int): The largest block passed to process().
+        """
+        self.max_block_size = max_block_size
+        self._buffers = np.zeros((2, max_block_size, channels), dtype=np.float32)
+        for plugin in self.plugins.values():
+            plugin.prepare(sample_rate, channels, max_block_size)
+
+    def reset(self) -> None:
+        """
+        Clear the state of every plugin.
+        """
+        for plugin in self.plugins.values():
+            plugin.reset()
+
+    def set_order(self, order: List[str]) -> None:
+        """
+        Reorder, insert or remove stages. Plugins entering the chain start
+        from a cleared state so stale tails are not replayed.
+
+        Parameters:
+            order (List[str]): Keys of the plugins in the chain, first stage first.
+                Unknown and repeated keys are ignored.
+        """
+        new_order = []
+        for key in order:
+            if key in self.plugins and key not in new_order:
+                new_order.append(key)
+        for key in new_order:
+            if key not in self.order:
+                self.plugins[key].reset()
+        self.order = new_order
+        self._publish()
+
+    def set_enabled(self, key: str, enabled: bool) -> None:
+        """
+        Enable or bypass a plugin, resetting it when it is switched back on.
+
+        Parameters:
+            key (str): The plugin key.
+            enabled (bool): Whether the plugin should process audio.
+        """
+        if enabled and not self.enabled[key]:
+            self.plugins[key].reset()
+        self.enabled[key] = enabled
+        self._publish()
+
+    def _publish(self) -> None:
+        # Plugins are reset before they appear here, while the audio thread cannot see them
+        self.stages = tuple(self.plugins[key] for key in self.order if self.enabled[key])
+
+    def process(self, input: np.ndarray) -> np.ndarray:
+        """
+        Run one block through every active stage in order.
+
+        Parameters:
+            input (np.ndarray): Audio of shape (frames, channels).
+
+        Returns:
+            np.ndarray: The processed block. This is either the input itself, when no
+                stage is active, or a view of a chain buffer that the next call
+                overwrites.
+        """
+        block_len = input.shape[0]
+        if block_len > self.max_block_size:
+            # Outside the prepared contract, split so plugins stay within their buffers
+            return np.concatenate([
+                self.process(input[start:start + self.max_block_size]).copy()
+                for start in range(0, block_len, self.max_block_size)
+            ])
+
+        source = input
+        target = 0
+        profiler = self.profiler
+        for plugin in self.stages:
+            output = self._buffers[target, :block_len]
+            if profiler is None:
+                plugin.process(source, output)
+            else:
+                start = perf_counter_ns()
+                plugin.process(source, output)
+                profiler.record_stage(self._profile_slots[plugin], perf_counter_ns() - start)
+            source = output
+            target ^= 1
+        return source
@@ -1,73 +1,103 @@
+from typing import NamedTuple, Optional
+
 import numpy as np
-import copy
+
+from signal_processing.comb_bank import CombFilterBank
+from signal_processing.plugin import AudioPlugin, prevent_clipping
+
+
+class ReverbParams(NamedTuple):
+    decay: float
+    wet_level: float
+    allow_clipping: bool
 
 
-class ReverbPlugin():
-    def __init__(self, decay: float = 0, delay_samps: int = 1, wet_level: float = 0, taps: int = 0, allow_clipping: bool = True, old_plugin: 'ReverbPlugin' = None, channels: int = 2):
-        self.decay = decay
+class ReverbPlugin(AudioPlugin):
+    def __init__(self, decay: float = 0, delay_samps: int = 1, wet_level: float = 0, taps: int = 0, allow_clipping: bool = True):
+        super().__init__()
+        self.params = self.validate_params(ReverbParams(decay, wet_level, allow_clipping))
+        # Delay and taps shape the comb bank, which is swapped as a whole when they change
         self.taps = taps
-        self.wet_level = max(0.0, min(1.0, wet_level))
         self.delay_samps = delay_samps
-        self.channels = channels
-        self.allow_clipping = allow_clipping
-        
-        # dont need new buffers we can smoothly turn this knob
-        if old_plugin and old_plugin.taps == taps and old_plugin.delay_samps == delay_samps and old_plugin.channels == channels:
-            self.delay_samps_list = copy.deepcopy(old_plugin.delay_samps_list)
-            self.buffers = copy.deepcopy(old_plugin.buffers)
-            self.buffer_indices = copy.deepcopy(old_plugin.buffer_indices)
-        # need new buffers, have to restart rebverb mixing
-        else:
-            # dither the buffer lengths for natural sound
-            self.delay_samps_list = [int(self.delay_samps * (1 + 0.15 * i)) for i in range(self.taps)]
-            self.buffers = [
-                [np.zeros(delay) for delay in self.delay_samps_list]
-                for _ in range(self.channels)
-            ]
-            self.buffer_indices = [
-                [0 for _ in self.delay_samps_list]
-                for _ in range(self.channels)
-            ]
-            
+
+        self.delay_samps_list = self._tap_delays(delay_samps, taps)
+        # Delay lines are sized for the stream in prepare(). The control
+        # thread allocates a replacement bank as `next_comb_bank`; the audio
+        # thread moves the tail into it and swaps it in at a block boundary
+        self.comb_bank: Optional[CombFilterBank] = None
+        self.next_comb_bank: Optional[CombFilterBank] = None
+
+    @staticmethod
+    def _tap_delays(delay_samps: int, taps: int):
+        # dither the buffer lengths for natural sound
+        return [int(delay_samps * (1 + 0.15 * i)) for i in range(taps)]
+
+    def validate_params(self, params: ReverbParams) -> ReverbParams:
+        return params._replace(wet_level=max(0.0, min(1.0, params.wet_level)))
+
+    def prepare(self, sample_rate: int, channels: int, max_block_size: int):
+        super().prepare(sample_rate, channels, max_block_size)
+        self.comb_bank = CombFilterBank(self.delay_samps_list, channels, max_block_size)
+        self.next_comb_bank = self.comb_bank
+        self.wet_total = np.zeros((max_block_size, channels), dtype=np.float32)
+
+    def reset(self):
+        super().reset()
+        if self.comb_bank is not None:
+            self.comb_bank.reset()
+
+    def set_decay(self, decay: float):
+        self.update_params(decay=decay)
+
+    def set_wet_level(self, wet_level: float):
+        self.update_params(wet_level=wet_level)
+
+    def set_allow_clipping(self, allow_clipping: bool):
+        self.update_params(allow_clipping=allow_clipping)
+
+    def set_delay(self, delay_samps: int, taps: int):
+        # Allocate the resized bank here, off the audio thread. process()
+        # copies the current tail into it and swaps it in at its next block
+        if delay_samps == self.delay_samps and taps == self.taps:
+            return
+        self.delay_samps = delay_samps
+        self.taps = taps
+        self.delay_samps_list = self._tap_delays(delay_samps, taps)
+        if self.comb_bank is not None:
+            self.next_comb_bank = CombFilterBank(self.delay_samps_list, self.channels, self.max_block_size)
+
+    def _swap_comb_bank(self) -> CombFilterBank:
+        # Audio thread only: it alone assigns comb_bank, so the old bank is
+        # never copied while it is being processed
+        comb_bank = self.comb_bank
+        next_comb_bank = self.next_comb_bank
+        if next_comb_bank is not comb_bank:
+            next_comb_bank.take_tail(comb_bank)
+            self.comb_bank = comb_bank = next_comb_bank
+        return comb_bank
+
     # https://en.wikipedia.org/wiki/Comb_filter#Feedback_form
     # Multi channel reverb where each tap represents a feedback comb filter with a unique delay
-    def apply(self, input: np.ndarray):
-        # Wet buffer to apply to input signal
+    def process(self, input: np.ndarray, output: np.ndarray):
+        params = self.params
+        comb_bank = self._swap_comb_bank()
+        taps = len(comb_bank.delays)
         block_len = input.shape[0]
-        output = np.copy(input)
-        wet_total = np.zeros_like(output)
-        # Apply reverb to all channels
-        for ch in range(self.channels):
-            wet_sum = np.zeros(block_len)
-            # Apply taps
-            for tap, delay in enumerate(self.delay_samps_list):
-                # Grab circular buffer holding wet signal for this tap and the write index
-                buf = self.buffers[ch][tap]
-                idx = self.buffer_indices[ch][tap]
-                # Grab wet signal portion for this tap from circular buffer
-                # the buffers are different length for each tap so we modulo the index
-                wet = np.zeros(block_len)
-                idxs = (np.arange(idx, idx + block_len) % delay)
-                wet[:] = buf[idxs]
-                # add the input back and our wet signal potion with delay and decay gain
-                buf[idxs] = input[:, ch] + self.decay * wet
-                self.buffers[ch][tap] = buf
-                # update the write index on the circular buffer
-                idx = (idx + block_len) % delay
-                self.buffer_indices[ch][tap] = idx
-                # update the wet sum for this channel
-                wet_sum += wet
-            
-             # Average wet for this channel across taps
-            wet_total[:, ch] = wet_sum / self.taps
-
-        # Mix dry and wet signals
-        output = (1 - self.wet_level) * input + self.wet_level * wet_total
-
-        if self.allow_clipping:
-            return output
+        # Wet buffer to apply to input signal
+        wet_total = self.wet_total[:block_len]
+        if taps:
+            # All taps of all channels run through the comb bank in one pass
+            wet_sum = comb_bank.process(input, params.decay)
+            # Average wet across taps
+            np.divide(wet_sum, taps, out=wet_sum)
+            wet_total[:] = wet_sum
+            wet_total *= params.wet_level
         else:
-            return output / max(1.0, np.max(np.abs(output)))
-
+            wet_total[:] = 0
 
+        # Mix dry and wet signals
+        np.multiply(input, 1 - params.wet_level, out=output)
+        output += wet_total
 
+        if not params.allow_clipping:
+            prevent_clipping(output)
@@ -0,0 +1,78 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class StreamingSTFT:
+    """
+    Short-time Fourier transform over a stream of arbitrarily sized chunks.
+
+    Frames are nfft samples long and start every hop samples, counted from
+    the first sample ever processed. Samples that do not complete a frame are
+    carried over to the next call. Each call frames all new samples at once
+    with a strided view, applies a cached Hann window and runs one batched
+    rfft, so there is no per-sample or per-hop Python work.
+    """
+
+    def __init__(self, nfft: int, hop: int) -> None:
+        """
+        Parameters:
+            nfft (int): Frame length in samples.
+            hop (int): Samples between the starts of consecutive frames.
+        """
+        self.nfft = nfft
+        self.hop = hop
+        self.bins = nfft // 2
+        self.window = np.hanning(nfft)
+        # Carried-over samples followed by the new chunk, grown on demand
+        self._samples = np.zeros(2 * nfft, dtype=np.float32)
+        self._carry = 0
+        self._windowed = np.zeros((0, nfft))
+        self._magnitudes = np.zeros((0, self.bins))
+
+    def reset(self) -> None:
+        """
+        Drop any carried-over samples.
+        """
+        self._carry = 0
+
+    def _reserve(self, samples: int, frames: int) -> None:
+        if samples > self._samples.shape[0]:
+            grown = np.zeros(max(samples, 2 * self._samples.shape[0]), dtype=np.float32)
+            grown[:self._carry] = self._samples[:self._carry]
+            self._samples = grown
+        if frames > self._windowed.shape[0]:
+            self._windowed = np.zeros((frames, self.nfft))
+            self._magnitudes = np.zeros((frames, self.bins))
+
+    def process(self, audio: np.ndarray) -> np.ndarray:
+        """
+        Transform every frame completed by a new chunk of audio.
+
+        Parameters:
+            audio (np.ndarray): 1-D block of new samples.
+
+        Returns:
+            np.ndarray: Magnitude spectra of shape (frames, nfft // 2), oldest
+                first. The array is reused by the next call.
+        """
+        total = self._carry + audio.shape[0]
+        frames = 0 if total < self.nfft else (total - self.nfft) // self.hop + 1
+        self._reserve(total, frames)
+        samples = self._samples
+        samples[self._carry:total] = audio
+
+        if frames:
+            framed = sliding_window_view(samples[:total], self.nfft)[::self.hop][:frames]
+            windowed = self._windowed[:frames]
+            np.multiply(framed, self.window, out=windowed)
+            spectra = np.fft.rfft(windowed, axis=1)
+            magnitudes = self._magnitudes[:frames]
+            np.abs(spectra[:, :self.bins], out=magnitudes)
+        else:
+            magnitudes = self._magnitudes[:0]
+
+        # Keep the samples the next frame starts from
+        consumed = frames * self.hop
+        self._carry = total - consumed
+        samples[:self._carry] = samples[consumed:total]
+        return magnitudes
@@ -0,0 +1,64 @@
+import threading
+
+import numpy as np
+
+from signal_processing.reverb import ReverbPlugin
+
+BLOCK = 100
+
+
+def _impulse_response(plugin: ReverbPlugin, frames: int, on_block=None) -> np.ndarray:
+    # Feed a unit impulse through a prepared plugin in BLOCK sized blocks
+    signal = np.zeros((frames, 1), dtype=np.float32)
+    signal[0] = 1.0
+    output = np.zeros_like(signal)
+    for index, start in enumerate(range(0, frames, BLOCK)):
+        if on_block is not None:
+            on_block(index)
+        plugin.process(signal[start:start + BLOCK], output[start:start + BLOCK])
+    return output[:, 0]
+
+
+def test_delay_change_keeps_tail():
+    plugin = ReverbPlugin(decay=0.5, delay_samps=300, wet_level=1.0, taps=1)
+    plugin.prepare(44100, 1, BLOCK)
+
+    def change_delay(index):
+        # From another thread, as the control thread does, between blocks 1 and 2
+        if index == 2:
+            thread = threading.Thread(target=plugin.set_delay, args=(400, 1))
+            thread.start()
+            thread.join()
+
+    output = _impulse_response(plugin, 1000, change_delay)
+    # The impulse written before the change comes out one new delay later,
+    # then keeps recirculating
+    expected = np.zeros(1000, dtype=np.float32)
+    expected[400] = 1.0
+    expected[800] = 0.5
+    np.testing.assert_array_equal(output, expected)
+
+
+def test_delay_changes_while_processing():
+    plugin = ReverbPlugin(decay=0.9, delay_samps=300, wet_level=1.0, taps=1)
+    plugin.prepare(44100, 1, BLOCK)
+    done = threading.Event()
+
+    def grow_delay():
+        # Growing lines drop nothing, so every echo must survive every swap
+        delay = 300
+        while not done.is_set() and delay < 400:
+            delay += 1
+            plugin.set_delay(delay, 1)
+
+    thread = threading.Thread(target=grow_delay)
+    thread.start()
+    try:
+        output = _impulse_response(plugin, 20000)
+    finally:
+        done.set()
+        thread.join()
+
+    echoes = output[output != 0]
+    assert echoes.shape[0] >= 40
+    np.testing.assert_allclose(echoes, 0.9 ** np.arange(echoes.shape[0]), rtol=1e-5)
@@ -16,6 +16,7 @@ class ControlPanel(QtWidgets.QWidget):
         """
         super().__init__(parent)
         
+        self.state = state
         self.message_bus = message_bus
 
         # Main layout for the control panel
@@ -35,7 +36,8 @@ class ControlPanel(QtWidgets.QWidget):
         self.popups: Dict[str, Any] = {}
         for name, popup in ALL_POPUPS.items():
             
-            def open_popup():
+            # Bind name/popup per button, a plain closure would see the last loop values
+            def open_popup(_checked=False, name=name, popup=popup):
                 if name not in self.popups.keys():
                     self.popups[name] = popup(self, message_bus=self.message_bus)
                 self.popups[name].show()
@@ -45,5 +47,30 @@ class ControlPanel(QtWidgets.QWidget):
             button = QtWidgets.QPushButton(name)
             button.clicked.connect(open_popup)
             main_layout.addWidget(button)
+
+        # How far the display lags the audio
+        self.latency_label = QtWidgets.QLabel("Display lag: -")
+        main_layout.addWidget(self.latency_label)
+
+        # Audio thread load, only updated when profiling is enabled
+        self.dsp_label = QtWidgets.QLabel("")
+        main_layout.addWidget(self.dsp_label)
+
+    def set_latency(self, seconds: float) -> None:
+        """
+        Show the current display lag.
+
+        Parameters:
+            seconds (float): Lag between the audio thread and the drawn waveform.
+        """
+        self.latency_label.setText(f"Display lag: {seconds * 1000:.0f} ms")
         
 
+    def set_dsp_load(self, text: str) -> None:
+        """
+        Show the audio thread's DSP load summary.
+
+        Parameters:
+            text (str): The summary line from the profiler.
+        """
+        self.dsp_label.setText(text)
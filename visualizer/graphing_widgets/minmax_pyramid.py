@@ -0,0 +1,117 @@
+from typing import Tuple
+
+import numpy as np
+
+
+class MinMaxPyramid:
+    """
+    Peak-preserving level-of-detail summary of a sample stream.
+
+    Level L (from 1) holds the minimum and maximum of each bucket of 2**L
+    consecutive samples, aligned to the absolute sample count, in a ring long
+    enough to cover `capacity` samples. Levels are updated incrementally as
+    chunks arrive: level 1 from the raw chunk and every higher level from the
+    buckets just updated below it, so a push costs O(chunk) in total. The
+    newest bucket of each level stays current while it fills.
+    """
+
+    def __init__(self, capacity: int, min_buckets: int = 16) -> None:
+        """
+        Parameters:
+            capacity (int): The longest span, in samples, that can be queried.
+            min_buckets (int): Levels stop once they would cover capacity
+                with fewer buckets than this.
+        """
+        self.capacity = capacity
+        self.count = 0
+        # Index L - 1 holds level L
+        self.mins = []
+        self.maxs = []
+        level = 1
+        while (capacity >> level) >= min_buckets:
+            buckets = (capacity >> level) + 2
+            self.mins.append(np.zeros(buckets, dtype=np.float32))
+            self.maxs.append(np.zeros(buckets, dtype=np.float32))
+            level += 1
+
+    @property
+    def levels(self) -> int:
+        return len(self.mins)
+
+    def reset(self) -> None:
+        """
+        Forget all samples. Old buckets are overwritten as new ones fill.
+        """
+        self.count = 0
+
+    def push(self, chunk: np.ndarray) -> None:
+        """
+        Add new samples to every level.
+
+        Parameters:
+            chunk (np.ndarray): 1-D block of new samples.
+        """
+        start = self.count + max(0, chunk.shape[0] - self.capacity)
+        chunk = chunk[-self.capacity:]
+        self.count = start + chunk.shape[0]
+        if chunk.shape[0] == 0:
+            return
+
+        low, high = chunk, chunk
+        for level in range(1, self.levels + 1):
+            # Children are level - 1 buckets (raw samples for level 1); a new
+            # bucket starts at every even absolute child index
+            first_child = start >> (level - 1)
+            second = 1 if first_child & 1 else 2
+            starts = np.arange(second - 2, low.shape[0], 2)
+            starts[0] = 0
+            low = np.minimum.reduceat(low, starts)
+            high = np.maximum.reduceat(high, starts)
+
+            ring_low = self.mins[level - 1]
+            ring_high = self.maxs[level - 1]
+            buckets = ring_low.shape[0]
+            pos = (start >> level) % buckets
+            if start & ((1 << level) - 1):
+                # The first bucket already holds samples from earlier pushes
+                low[0] = min(low[0], ring_low[pos])
+                high[0] = max(high[0], ring_high[pos])
+
+            n = low.shape[0]
+            first = min(n, buckets - pos)
+            ring_low[pos:pos + first] = low[:first]
+            ring_low[:n - first] = low[first:]
+            ring_high[pos:pos + first] = high[:first]
+            ring_high[:n - first] = high[first:]
+
+    def envelope(self, level: int, window: int, low: np.ndarray, high: np.ndarray) -> Tuple[int, int]:
+        """
+        Copy the buckets covering the newest `window` samples at one level.
+
+        Parameters:
+            level (int): Level to read, from 1 to levels.
+            window (int): Number of newest samples to cover, at most capacity.
+            low (np.ndarray): Receives the bucket minimums, oldest first.
+            high (np.ndarray): Receives the bucket maximums, oldest first.
+
+        Returns:
+            Tuple[int, int]: Absolute sample index where the first bucket
+                starts, and the number of buckets copied.
+        """
+        end = self.count
+        if end == 0:
+            return 0, 0
+        window_start = max(0, end - min(window, self.capacity))
+        first_bucket = window_start >> level
+        n = ((end - 1) >> level) - first_bucket + 1
+
+        ring_low = self.mins[level - 1]
+        ring_high = self.maxs[level - 1]
+        buckets = ring_low.shape[0]
+        pos = first_bucket % buckets
+        first = min(n, buckets - pos)
+        low[:first] = ring_low[pos:pos + first]
+        low[first:n] = ring_low[:n - first]
+        high[:first] = ring_high[pos:pos + first]
+        high[first:n] = ring_high[:n - first]
+        return first_bucket << level, n
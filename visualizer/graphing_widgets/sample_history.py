@@ -0,0 +1,124 @@
+from typing import Tuple
+
+import numpy as np
+
+# Level of silence in the waveform's dB view
+DB_FLOOR = -80
+
+
+def amplitude_to_db(samples: np.ndarray, out: np.ndarray) -> np.ndarray:
+    """
+    Convert samples to dB of their magnitude, clipped to DB_FLOOR..0.
+
+    Parameters:
+        samples (np.ndarray): The samples to convert.
+        out (np.ndarray): Buffer receiving the result, at least as long.
+
+    Returns:
+        np.ndarray: The filled part of out.
+    """
+    out = out[:samples.shape[0]]
+    np.abs(samples, out=out)
+    np.maximum(out, 1e-8, out=out)
+    np.log10(out, out=out)
+    out *= 20
+    np.clip(out, DB_FLOOR, 0, out=out)
+    return out
+
+
+class SampleHistory:
+    """
+    Ring buffer of the most recent samples shown by the visualizer.
+
+    New samples are written at `head`, which then wraps around, so pushing a
+    chunk only copies the chunk. The newest n samples are always at most two
+    contiguous slices of the buffer.
+
+    A parallel ring holds the same samples in dB, converted once on arrival,
+    so switching the display to dB needs no log math over the window.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        """
+        Parameters:
+            capacity (int): Number of samples kept.
+        """
+        self.buffer = np.zeros(max(1, capacity), dtype=np.float32)
+        self.db_buffer = np.full_like(self.buffer, DB_FLOOR)
+        self.head = 0
+
+    @property
+    def capacity(self) -> int:
+        return self.buffer.shape[0]
+
+    def push(self, chunk: np.ndarray, db_chunk: np.ndarray) -> None:
+        """
+        Append samples, overwriting the oldest.
+
+        Parameters:
+            chunk (np.ndarray): 1-D block of new samples.
+            db_chunk (np.ndarray): The same samples converted by amplitude_to_db.
+        """
+        chunk = chunk[-self.capacity:]
+        db_chunk = db_chunk[-self.capacity:]
+        n = chunk.shape[0]
+        first = min(n, self.capacity - self.head)
+        for buffer, data in ((self.buffer, chunk), (self.db_buffer, db_chunk)):
+            buffer[self.head:self.head + first] = data[:first]
+            buffer[:n - first] = data[first:]
+        self.head = (self.head + n) % self.capacity
+
+    def slices(self, n: int, db: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Views of the newest n samples, oldest first.
+
+        Parameters:
+            n (int): Number of samples, at most capacity.
+            db (bool): Read the dB ring instead of the linear one.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: The older and newer parts, either may be empty.
+        """
+        buffer = self.db_buffer if db else self.buffer
+        n = min(n, self.capacity)
+        start = self.head - n
+        if start >= 0:
+            return buffer[start:self.head], buffer[:0]
+        return buffer[start:], buffer[:self.head]
+
+    def latest(self, n: int, out: np.ndarray, db: bool = False) -> np.ndarray:
+        """
+        Copy the newest n samples, oldest first.
+
+        Parameters:
+            n (int): Number of samples, at most capacity.
+            out (np.ndarray): Buffer receiving them from the start.
+            db (bool): Read the dB ring instead of the linear one.
+
+        Returns:
+            np.ndarray: The filled part of out.
+        """
+        older, newer = self.slices(n, db)
+        out[:older.shape[0]] = older
+        out[older.shape[0]:older.shape[0] + newer.shape[0]] = newer
+        return out[:older.shape[0] + newer.shape[0]]
+
+    def resize(self, capacity: int) -> None:
+        """
+        Change the capacity, keeping as much of the newest history as fits.
+
+        Parameters:
+            capacity (int): New number of samples kept.
+        """
+        capacity = max(1, capacity)
+        if capacity == self.capacity:
+            return
+        kept = min(capacity, self.capacity)
+        buffer = np.zeros(capacity, dtype=np.float32)
+        db_buffer = np.full_like(buffer, DB_FLOOR)
+        # With head at 0 the newest sample sits at the end, older silence before it
+        self.latest(kept, buffer[capacity - kept:])
+        self.latest(kept, db_buffer[capacity - kept:], db=True)
+        self.buffer = buffer
+        self.db_buffer = db_buffer
+        self.head = 0
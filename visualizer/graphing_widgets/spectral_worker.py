@@ -0,0 +1,178 @@
+import queue
+from threading import Lock, Thread
+from typing import Any, NamedTuple, Optional
+
+import numpy as np
+
+from signal_processing.stft import StreamingSTFT
+
+
+class _Configure(NamedTuple):
+    scale: Any
+    nfft: int
+    hop: int
+    samplerate: int
+
+
+class SpectralWorker:
+    """
+    Background thread that turns the waveform stream into finished
+    spectrogram columns, so FFT cost never lands on the Qt GUI thread.
+
+    The GUI thread submits audio chunks as they are drained from the
+    waveform ring. The worker batches whatever has queued up, runs the
+    streaming STFT, maps the bins to display rows with the scale's
+    filterbank (one sparse product per batch), converts them to display
+    values and
+    writes the columns into its own ring. At render time the GUI thread
+    copies out the columns in time order; the lock guarding the ring is only
+    held for those copies.
+
+    When analysis falls behind, queued audio older than the spectrogram can
+    show is dropped rather than analysed.
+    """
+
+    def __init__(self, scale: Any, nfft: int, hop: int, columns: int, samplerate: int) -> None:
+        """
+        Parameters:
+            scale (HistogramScale): Maps magnitude spectra to display rows and values.
+            nfft (int): FFT frame length in samples.
+            hop (int): Samples between frames, one spectrogram column each.
+            columns (int): Number of columns kept for display.
+            samplerate (int): The audio sample rate.
+        """
+        self.columns = columns
+        self.lock = Lock()
+        self._input: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._configure(_Configure(scale, nfft, hop, samplerate))
+        self.thread = Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def _configure(self, config: _Configure) -> None:
+        stft = StreamingSTFT(config.nfft, config.hop)
+        # Built once per (samplerate, nfft, rows) and cached
+        filterbank = config.scale.filterbank(config.samplerate, config.nfft)
+        rows = stft.bins if filterbank is None else filterbank.shape[0]
+        with self.lock:
+            self.scale = config.scale
+            self.filterbank = filterbank
+            self.stft = stft
+            self.spec_buffer = np.zeros((rows, self.columns), dtype=np.float32)
+            self.spec_col = 0
+            # Bumped on every change, so readers can skip unchanged frames
+            self.generation = 1
+            self._read_generation = 0
+
+    def history_samples(self) -> int:
+        """
+        Number of most recent samples that can still affect the display.
+        """
+        return self.columns * self.stft.hop + self.stft.nfft
+
+    def submit(self, audio: np.ndarray) -> None:
+        """
+        Queue new audio for analysis. Called from the GUI thread.
+
+        Parameters:
+            audio (np.ndarray): 1-D block of samples, copied before queueing.
+        """
+        self._input.put(audio.copy())
+
+    def set_analysis(self, scale: Any, nfft: int, hop: int, samplerate: int) -> None:
+        """
+        Change the scale, frame length and hop. Applied in stream order, the
+        display restarts empty at the new resolution.
+
+        Parameters:
+            scale (HistogramScale): Maps magnitude spectra to display rows and values.
+            nfft (int): FFT frame length in samples.
+            hop (int): Samples between frames.
+            samplerate (int): The audio sample rate.
+        """
+        self._input.put(_Configure(scale, nfft, hop, samplerate))
+
+    def stop(self) -> None:
+        """
+        Stop the worker thread.
+        """
+        self._input.put(None)
+        self.thread.join(timeout=1)
+
+    def run(self) -> None:
+        while True:
+            item = self._input.get()
+            if item is None:
+                return
+            if isinstance(item, _Configure):
+                self._configure(item)
+                continue
+
+            # Batch everything else that queued up meanwhile
+            chunks = [item]
+            pending = None
+            while pending is None:
+                try:
+                    next_item = self._input.get_nowait()
+                except queue.Empty:
+                    break
+                if isinstance(next_item, np.ndarray):
+                    chunks.append(next_item)
+                else:
+                    pending = next_item
+            self._analyse(np.concatenate(chunks) if len(chunks) > 1 else chunks[0])
+
+            # Config changes and stop requests keep their place in the stream
+            if pending is not None:
+                if isinstance(pending, _Configure):
+                    self._configure(pending)
+                else:
+                    return
+
+    def _analyse(self, audio: np.ndarray) -> None:
+        keep = self.history_samples()
+        if audio.shape[0] > keep:
+            # Behind: the skipped audio would have scrolled out anyway
+            audio = audio[-keep:]
+            self.stft.reset()
+        magnitudes = self.stft.process(audio)
+        if magnitudes.shape[0] == 0:
+            return
+        if self.filterbank is not None:
+            magnitudes = (self.filterbank @ magnitudes.T).T
+        self.scale.convert(magnitudes)
+        self._push_columns(magnitudes)
+
+    def _push_columns(self, columns: np.ndarray) -> None:
+        cols = self.columns
+        columns = columns[-cols:]
+        count = columns.shape[0]
+        with self.lock:
+            first = min(count, cols - self.spec_col)
+            self.spec_buffer[:, self.spec_col:self.spec_col + first] = columns[:first].T
+            self.spec_buffer[:, :count - first] = columns[first:].T
+            self.spec_col = (self.spec_col + count) % cols
+            self.generation += 1
+
+    def read_columns(self, out: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        """
+        Copy the spectrogram columns in time order, oldest first, if they
+        changed since the last call. Called from the GUI thread.
+
+        Parameters:
+            out (Optional[np.ndarray]): Buffer to reuse, replaced if its shape
+                no longer matches the analysis resolution.
+
+        Returns:
+            Optional[np.ndarray]: The filled buffer of shape (rows, columns),
+                or None if nothing changed.
+        """
+        with self.lock:
+            if self.generation == self._read_generation:
+                return None
+            self._read_generation = self.generation
+            if out is None or out.shape != self.spec_buffer.shape:
+                out = np.empty_like(self.spec_buffer)
+            tail = self.columns - self.spec_col
+            out[:, :tail] = self.spec_buffer[:, self.spec_col:]
+            out[:, tail:] = self.spec_buffer[:, :self.spec_col]
+        return out
@@ -1,9 +1,23 @@
 from abc import ABC
+from typing import Optional
+
 import numpy as np
 from pyqtgraph import GraphicsLayoutWidget, HistogramLUTItem, ImageItem, PlotWidget  
 from pyqtgraph.Qt import QtCore, QtWidgets  
+from scipy import sparse
+
+from signal_processing.filterbanks import build_filterbank, row_frequencies
+from visualizer.graphing_widgets.spectral_worker import SpectralWorker
+
+# Rows shown by the filterbank scales, independent of the FFT size
+FILTERBANK_ROWS = 256
+# Frequencies labelled on the axis of the filterbank scales
+FREQUENCY_TICKS = [50, 100, 200, 500, 1000, 2000, 5000, 10000, 20000]
 
 class HistogramScale(ABC): 
+    # Filterbank kind mapping FFT bins to display rows, None shows the bins as they are
+    filterbank_kind: Optional[str] = None
+
     @staticmethod
     def default_levels() -> list[float]:
         """
@@ -15,15 +29,59 @@ class HistogramScale(ABC):
         return []
 
     @staticmethod        
-    def convert(new_audio: np.ndarray, graph: 'SpectrogramGraph') -> None:
+    def convert(magnitudes: np.ndarray) -> None:
         """
-        Convert new audio data for the spectrogram graph (to be implemented by subclasses).
+        Convert magnitude spectra in place to display values (to be implemented by subclasses).
 
         Parameters:
-            new_audio (np.ndarray): The new audio data to process.
-            graph (SpectrogramGraph): The SpectrogramGraph instance to update.
+            magnitudes (np.ndarray): Spectra of shape (frames, bins), overwritten.
         """
         pass
+
+    def rows(self, nfft: int) -> int:
+        """
+        Return the number of display rows for an FFT size.
+
+        Parameters:
+            nfft (int): FFT frame length.
+
+        Returns:
+            int: Rows per spectrogram column.
+        """
+        if self.filterbank_kind is None:
+            return nfft // 2
+        return FILTERBANK_ROWS
+
+    def filterbank(self, samplerate: int, nfft: int) -> Optional[sparse.csr_matrix]:
+        """
+        Return the cached matrix mapping FFT bins to display rows.
+
+        Parameters:
+            samplerate (int): The audio sample rate.
+            nfft (int): FFT frame length.
+
+        Returns:
+            Optional[sparse.csr_matrix]: Matrix of shape (rows, nfft // 2), or
+                None if the bins are displayed directly.
+        """
+        if self.filterbank_kind is None:
+            return None
+        return build_filterbank(self.filterbank_kind, samplerate, nfft, self.rows(nfft))
+
+    def row_frequencies(self, samplerate: int, nfft: int) -> np.ndarray:
+        """
+        Return the centre frequency of each display row.
+
+        Parameters:
+            samplerate (int): The audio sample rate.
+            nfft (int): FFT frame length.
+
+        Returns:
+            np.ndarray: Frequencies in Hz, lowest first.
+        """
+        if self.filterbank_kind is None:
+            return np.arange(nfft // 2) * samplerate / nfft
+        return row_frequencies(self.filterbank_kind, samplerate, nfft, self.rows(nfft))
     
 
 class DecibelScale(HistogramScale):
@@ -38,27 +96,38 @@ class DecibelScale(HistogramScale):
         return [-80, 0]
     
     @staticmethod
-    def convert(new_audio: np.ndarray, graph: 'SpectrogramGraph') -> None:
+    def convert(magnitudes: np.ndarray) -> None:
         """
-        Convert new audio data to decibel scale and update the spectrogram buffer.
+        Convert magnitude spectra in place to decibels, clipped to the default range.
 
         Parameters:
-            new_audio (np.ndarray): The new audio data to process.
-            graph (SpectrogramGraph): The SpectrogramGraph instance to update.
-        """
-        audio = new_audio.astype(np.float32)
-        for sample in audio:
-            graph._spec_audio_buffer[graph._spec_audio_buffer_pos] = sample
-            graph._spec_audio_buffer_pos += 1
-            while graph._spec_audio_buffer_pos >= graph.spec_nfft:
-                windowed = graph._spec_audio_buffer * np.hanning(graph.spec_nfft)
-                spectrum = np.abs(np.fft.rfft(windowed))[:graph.spec_nfft // 2]
-                spectrum_db = 20 * np.log10(np.maximum(spectrum, 1e-8))
-                spectrum_db = np.clip(spectrum_db, -80, 0)
-                graph.spec_buffer = np.roll(graph.spec_buffer, -1, axis=1)
-                graph.spec_buffer[:, -1] = spectrum_db
-                graph._spec_audio_buffer[:graph.spec_nfft - graph.spec_hop] = graph._spec_audio_buffer[graph.spec_hop:]
-                graph._spec_audio_buffer_pos -= graph.spec_hop
+            magnitudes (np.ndarray): Spectra of shape (frames, bins), overwritten.
+        """
+        np.maximum(magnitudes, 1e-8, out=magnitudes)
+        np.log10(magnitudes, out=magnitudes)
+        magnitudes *= 20
+        np.clip(magnitudes, -80, 0, out=magnitudes)
+
+
+class LogFrequencyScale(DecibelScale):
+    filterbank_kind = "log"
+
+
+class MelScale(DecibelScale):
+    filterbank_kind = "mel"
+
+
+class ConstantQScale(DecibelScale):
+    filterbank_kind = "cq"
+
+
+# Frequency scales offered in the display controls, by name
+FREQUENCY_SCALES = {
+    'Linear': DecibelScale,
+    'Logarithmic': LogFrequencyScale,
+    'Mel': MelScale,
+    'Constant-Q': ConstantQScale,
+}
     
 
 class SpectrogramGraph():
@@ -93,34 +162,108 @@ class SpectrogramGraph():
         spectro_layout.addWidget(self.spectrogram_plot, stretch=10)
         spectro_layout.addWidget(colorbar_widget, stretch=0)
         
-        # Spectrogram parameters and buffer
+        # Spectrogram parameters, the analysis itself runs on a worker thread
         self.spec_nfft: int = 512
         self.spec_hop: int = 128
         self.spec_buffer_cols: int = 400
-        self.spec_buffer = np.zeros((self.spec_nfft // 2, self.spec_buffer_cols), dtype=np.float32)
-        self.spec_col: int = 0
-        
-        self._spec_audio_buffer = np.zeros(self.spec_nfft, dtype=np.float32)
-        self._spec_audio_buffer_pos: int = 0
+        self.samplerate: int = 44100
+        self.worker = SpectralWorker(self.scale, self.spec_nfft, self.spec_hop, self.spec_buffer_cols, self.samplerate)
+        # Columns in time order, as last copied from the worker
+        self.spec_buffer: Optional[np.ndarray] = None
             
-    def update(self, new_audio: np.ndarray, buffer_seconds: float, samplerate: int) -> None:      
+    def history_samples(self) -> int:
         """
-        Update the spectrogram display with new audio data.
+        Number of most recent samples that can still affect the display.
+
+        Returns:
+            int: Samples spanned by the spectrogram buffer and its analysis window.
+        """
+        return self.spec_buffer_cols * self.spec_hop + self.spec_nfft
+
+    def configure(self, samplerate: int) -> None:
+        """
+        Set the sample rate of the analysed stream.
+
+        Parameters:
+            samplerate (int): The audio sample rate.
+        """
+        self.samplerate = samplerate
+        self._reconfigure()
+
+    def set_fft(self, nfft: int, hop: int) -> None:
+        """
+        Change the analysis resolution. The display restarts empty.
+
+        Parameters:
+            nfft (int): FFT frame length in samples.
+            hop (int): Samples between spectrogram columns.
+        """
+        self.spec_nfft = nfft
+        self.spec_hop = hop
+        self._reconfigure()
+
+    def set_scale(self, scale: HistogramScale) -> None:
+        """
+        Change the frequency scale of the display. The display restarts empty.
+
+        Parameters:
+            scale (HistogramScale): The new scale.
+        """
+        self.scale = scale
+        self._reconfigure()
+
+    def _reconfigure(self) -> None:
+        self.worker.set_analysis(self.scale, self.spec_nfft, self.spec_hop, self.samplerate)
+        axis = self.spectrogram_plot.getAxis('left')
+        if self.scale.filterbank_kind is None:
+            axis.setTicks(None)
+            return
+        # Rows are not linear in frequency, so label them at fixed frequencies
+        frequencies = self.scale.row_frequencies(self.samplerate, self.spec_nfft)
+        ticks = [
+            (float(np.interp(f, frequencies, np.arange(frequencies.shape[0]))), f"{f // 1000}k" if f >= 1000 else str(f))
+            for f in FREQUENCY_TICKS if frequencies[0] <= f <= frequencies[-1]
+        ]
+        axis.setTicks([ticks])
+
+    def add_audio(self, new_audio: np.ndarray) -> None:
+        """
+        Hand new audio to the analysis worker.
 
         Parameters:
             new_audio (np.ndarray): The new audio data to process.
+        """
+        self.worker.submit(new_audio)
+
+    def stop(self) -> None:
+        """
+        Stop the analysis worker.
+        """
+        self.worker.stop()
+
+    def render(self, buffer_seconds: float, samplerate: int) -> None:
+        """
+        Redraw the spectrogram image, uploading columns only when the worker
+        has produced new ones.
+
+        Parameters:
             buffer_seconds (float): The duration of the buffer in seconds.
             samplerate (int): The audio sample rate.
         """
-        self.scale.convert(new_audio, self)
-
         levels = self.spectrogram_colorbar.getLevels()
-        self.spectrogram_img.setImage(
-            self.spec_buffer.T,
-            autoLevels=False,
-            levels=levels
-        )
-        freq_extent = (0, samplerate / 2)
+        columns = self.worker.read_columns(self.spec_buffer)
+        if columns is not None:
+            self.spec_buffer = columns
+            self.spectrogram_img.setImage(
+                self.spec_buffer.T,
+                autoLevels=False,
+                levels=levels
+            )
+        if self.scale.filterbank_kind is None:
+            freq_extent = (0, samplerate / 2)
+        else:
+            # Filterbank scales are drawn in row units, labelled by the axis ticks
+            freq_extent = (0, self.spec_buffer.shape[0] if self.spec_buffer is not None else FILTERBANK_ROWS)
         self.spectrogram_img.setRect(
             QtCore.QRectF(
                 0, freq_extent[0],
@@ -128,4 +271,16 @@ class SpectrogramGraph():
             )
         )
         self.spectrogram_colorbar.setHistogramRange(*levels)
-        self.spectrogram_plot.setXRange(0, buffer_seconds, padding=0)
\ No newline at end of file
+        self.spectrogram_plot.setXRange(0, buffer_seconds, padding=0)
+
+    def update(self, new_audio: np.ndarray, buffer_seconds: float, samplerate: int) -> None:      
+        """
+        Update the spectrogram display with new audio data.
+
+        Parameters:
+            new_audio (np.ndarray): The new audio data to process.
+            buffer_seconds (float): The duration of the buffer in seconds.
+            samplerate (int): The audio sample rate.
+        """
+        self.add_audio(new_audio)
+        self.render(buffer_seconds, samplerate)
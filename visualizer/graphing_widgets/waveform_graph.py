@@ -2,6 +2,14 @@ import numpy as np
 import pyqtgraph as pg  
 from typing import Any
 
+from visualizer.graphing_widgets.minmax_pyramid import MinMaxPyramid
+from visualizer.graphing_widgets.sample_history import DB_FLOOR, SampleHistory
+
+# Longest window the display controls offer, the decimation pyramid covers this much
+MAX_WINDOW_SECONDS = 10.0
+# Used until the plot has been laid out and knows its width
+DEFAULT_PIXEL_WIDTH = 700
+
 class WaveformGraph:
     """
     Provides a wrapper around a pyqtgraph PlotWidget for displaying audio waveforms.
@@ -21,9 +29,44 @@ class WaveformGraph:
         self.plot_widget.setMouseEnabled(x=False, y=False)
         self.pen = pen
         self.curve = self.plot_widget.plot(pen=self.pen)
-        self.area_item = None
         self.area_enabled = False
+        # Baseline the curve is filled down to, None while area mode is off
+        self.fill_level = None
         self.ymode = False
+        self.samplerate = 1
+        # Linear samples and their dB values are decimated separately, so either
+        # mode is served from cached extremes
+        self.pyramid = MinMaxPyramid(0)
+        self.db_pyramid = MinMaxPyramid(0)
+        # Interleaved min/max points handed to the curve, grown with the plot width
+        self._x = np.zeros(0)
+        self._y = np.zeros(0)
+        self._low = np.zeros(0, dtype=np.float32)
+        self._high = np.zeros(0, dtype=np.float32)
+        self._raw = np.zeros(0, dtype=np.float32)
+
+    def configure(self, samplerate: int, max_seconds: float = MAX_WINDOW_SECONDS) -> None:
+        """
+        Size the decimation pyramids for the stream.
+
+        Parameters:
+            samplerate (int): The audio sample rate.
+            max_seconds (float): The longest window that will be displayed.
+        """
+        self.samplerate = samplerate
+        self.pyramid = MinMaxPyramid(int(samplerate * max_seconds))
+        self.db_pyramid = MinMaxPyramid(int(samplerate * max_seconds))
+
+    def push(self, chunk: np.ndarray, db_chunk: np.ndarray) -> None:
+        """
+        Add newly arrived samples to the decimation pyramids.
+
+        Parameters:
+            chunk (np.ndarray): The new samples.
+            db_chunk (np.ndarray): The same samples converted by amplitude_to_db.
+        """
+        self.pyramid.push(chunk)
+        self.db_pyramid.push(db_chunk)
 
     def set_data(self, x: np.ndarray, y: np.ndarray) -> None:
         """
@@ -33,16 +76,16 @@ class WaveformGraph:
             x (np.ndarray): The data for the x-axis.
             y (np.ndarray): The data for the y-axis.
         """
-        if not self.area_enabled and self.area_item is not None:
-            self.plot_widget.removeItem(self.area_item)
-            self.area_item = None
-            
-        if self.area_enabled:
-            self._draw_area(x, y)
-        else:
-            self.curve.setData(x, y)
-        
+        fill_level = (DB_FLOOR if self.ymode else 0) if self.area_enabled else None
+        if fill_level != self.fill_level:
+            self.fill_level = fill_level
+            self._apply_fill()
+        self.curve.setData(x, y)
 
+    def _apply_fill(self) -> None:
+        # The curve fills down to the baseline itself, no extra scene items
+        self.curve.setFillLevel(self.fill_level)
+        self.curve.setBrush(self.pen if self.fill_level is not None else None)
 
     def set_xrange(self, start: float, end: float) -> None:
         """
@@ -77,33 +120,59 @@ class WaveformGraph:
         """Enable or disable area under curve fill."""
         self.area_enabled = enabled
 
-    def _draw_area(self, x: np.ndarray, y: np.ndarray) -> None:
-        """Draw or update the area under the curve."""
-        if self.area_item is not None:
-            self.plot_widget.removeItem(self.area_item)
-        # Fill from y to baseline (0 for amplitude, -80 for dB)
-        baseline = -80 if self.ymode else 0 
-        area_x = np.concatenate([x, x[::-1]])
-        area_y = np.concatenate([y, np.full_like(y, baseline)])
-        self.area_item = pg.PlotDataItem(area_x, area_y, fillLevel=baseline, brush=self.pen, pen=self.pen)
-        self.plot_widget.addItem(self.area_item)
-
-    def update(self, buffer_seconds: float, plot_buffer: np.ndarray) -> None:
+    def _pixel_width(self) -> int:
+        width = int(self.plot_widget.getViewBox().width())
+        return width if width > 0 else DEFAULT_PIXEL_WIDTH
+
+    def _decimate(self, window: int, history: SampleHistory):
+        pyramid = self.db_pyramid if self.ymode else self.pyramid
+        # Smallest level whose buckets fit in one pixel each, ~2 points per pixel
+        width = self._pixel_width()
+        level = 0
+        while (window >> level) > width and level < pyramid.levels:
+            level += 1
+        if level == 0:
+            # Few enough samples to draw them all, straight from the history ring
+            if self._raw.shape[0] < window:
+                self._raw = np.zeros(window, dtype=np.float32)
+            x = np.arange(window) / self.samplerate
+            return x, history.latest(window, self._raw, db=self.ymode)
+
+        if self._low.shape[0] < (window >> level) + 2:
+            buckets = 2 * ((window >> level) + 2)
+            self._low = np.zeros(buckets, dtype=np.float32)
+            self._high = np.zeros(buckets, dtype=np.float32)
+            self._x = np.zeros(2 * buckets)
+            self._y = np.zeros(2 * buckets)
+        first_sample, n = pyramid.envelope(level, window, self._low, self._high)
+        x = self._x[:2 * n]
+        # Both points of a bucket sit at its start, drawing a vertical min-max span
+        window_start = pyramid.count - window
+        x[0::2] = np.arange(first_sample - window_start, first_sample - window_start + (n << level), 1 << level)
+        x[1::2] = x[0::2]
+        x /= self.samplerate
+        y = self._y[:2 * n]
+        y[0::2] = self._low[:n]
+        y[1::2] = self._high[:n]
+        return x, y
+
+    def update(self, buffer_seconds: float, history: SampleHistory) -> None:
         """
         Update the waveform plot with new data.
 
+        Windows wider than the plot are drawn from the min/max pyramids, so
+        each frame draws about two points per pixel whatever the duration.
+        dB values are converted once as samples arrive, never per frame.
+
         Parameters:
-            ymode (bool): If True, display the waveform in decibel scale; otherwise, show amplitude.
             buffer_seconds (float): The duration of the buffer in seconds.
-            plot_buffer (np.ndarray): The buffer containing waveform data.
+            history (SampleHistory): The waveform history, one window long.
         """
-        x = np.linspace(0, buffer_seconds, len(plot_buffer))
+        window = min(history.capacity, self.pyramid.capacity) if self.pyramid.levels else history.capacity
+        x, y = self._decimate(window, history)
         if self.ymode:
-            y = 20 * np.log10(np.maximum(np.abs(plot_buffer), 1e-8))
-            y = np.clip(y, -80, 0)
-            self.set_yrange(-80, 0)
+            self.set_yrange(DB_FLOOR, 0)
         else:
-            y = plot_buffer
             self.set_yrange(-1.0, 1.0)
         self.set_data(x, y)
         self.set_xrange(0, buffer_seconds)
@@ -114,4 +183,5 @@ class WaveformGraph:
         """
         self.curve.setPen(pen)
         self.pen = pen
+        self._apply_fill()
        
\ No newline at end of file
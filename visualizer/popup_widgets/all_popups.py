@@ -1,10 +1,16 @@
 from typing import Dict
 from visualizer.popup_widgets.amplifier_popup import AmplifierPopup
+from visualizer.popup_widgets.convolution_reverb_popup import ConvolutionReverbPopup
 from visualizer.popup_widgets.display_controls_popup import DisplayControlsPopup
+from visualizer.popup_widgets.freeverb_popup import FreeverbPopup
+from visualizer.popup_widgets.plugin_chain_popup import PluginChainPopup
 from visualizer.popup_widgets.reverb_popup import ReverbPopup
 
 ALL_POPUPS: Dict[str, type] = {
     "Amplifier": AmplifierPopup,
     "Display Controls": DisplayControlsPopup,
-    "Reverb": ReverbPopup
+    "Reverb": ReverbPopup,
+    "Freeverb": FreeverbPopup,
+    "Convolution Reverb": ConvolutionReverbPopup,
+    "Plugin Chain": PluginChainPopup
 }
\ No newline at end of file
@@ -0,0 +1,72 @@
+import os
+
+from pyqtgraph.Qt import QtWidgets
+from visualizer.common_widgets.numeric_control import NumericControl
+from message_bus import MessageBus, ConvolutionReverbSettingsMessage
+from visualizer.popup_widgets.popup_base import PopupBase
+
+class ConvolutionReverbPopup(PopupBase):
+    def __init__(self, parent, message_bus: MessageBus):
+        super().__init__(parent, message_bus)
+        self.setWindowTitle("Convolution Reverb Settings")
+        self.ir_path = ""
+
+        # Impulse response file picker
+        self.ir_label = QtWidgets.QLabel(self, text="No impulse response loaded")
+        self.ir_label.setWordWrap(True)
+        self.load_ir_button = QtWidgets.QPushButton("Load Impulse Response")
+        self.load_ir_button.clicked.connect(self.load_ir_event)
+        self.layout.insertWidget(self.layout.count() - 2, self.ir_label)
+        self.layout.insertWidget(self.layout.count() - 2, self.load_ir_button)
+
+        # Wet level
+        self.wet_control = NumericControl(
+            min_value=0.0,
+            max_value=1.0,
+            decimals=2,
+            initial_value=0.5,
+            slider_steps=100,
+            slider_change_func=self.convolution_reverb_event,
+            input_change_func=self.convolution_reverb_event
+        )
+        self.layout.insertWidget(self.layout.count() - 2, QtWidgets.QLabel(self, text="Wet Level"))
+        self.layout.insertWidget(self.layout.count() - 2, self.wet_control)
+
+        # Convolution reverb toggle button
+        self.toggle_button = QtWidgets.QPushButton("Enable Convolution Reverb")
+        self.toggle_button.setCheckable(True)
+        self.toggle_button.toggled.connect(self.convolution_reverb_event)
+        self.layout.insertWidget(self.layout.count() - 2, self.toggle_button)
+
+        # Allow Clipping toggle button
+        self.allow_clipping_button = QtWidgets.QPushButton("Allow Clipping")
+        self.allow_clipping_button.setCheckable(True)
+        self.allow_clipping_button.setChecked(True)
+        self.allow_clipping_button.toggled.connect(self.convolution_reverb_event)
+        self.layout.insertWidget(self.layout.count() - 2, self.allow_clipping_button)
+
+    def load_ir_event(self, _e=None):
+        path, _ = QtWidgets.QFileDialog.getOpenFileName(
+            self, "Select Impulse Response", "", "WAV files (*.wav)"
+        )
+        if not path:
+            return
+        self.ir_path = path
+        self.ir_label.setText(os.path.basename(path))
+        self.convolution_reverb_event()
+
+    def convolution_reverb_event(self, _e=None):
+        enabled = self.toggle_button.isChecked()
+        wet = self.wet_control.get_value()
+        allow_clipping = self.allow_clipping_button.isChecked()
+        message = ConvolutionReverbSettingsMessage(enabled, self.ir_path, wet, allow_clipping)
+        if enabled:
+            self.toggle_button.setText("Disable Convolution Reverb")
+        else:
+            self.toggle_button.setText("Enable Convolution Reverb")
+        if allow_clipping:
+            self.allow_clipping_button.setText("Disallow Clipping")
+        else:
+            self.allow_clipping_button.setText("Allow Clipping")
+        if self.message_bus:
+            self.message_bus.send(message)
@@ -1,11 +1,17 @@
 from pyqtgraph.Qt import QtWidgets
 from visualizer.common_widgets.numeric_control import NumericControl
+from visualizer.graphing_widgets.spectrogram_graph import FREQUENCY_SCALES
+from visualizer.graphing_widgets.waveform_graph import MAX_WINDOW_SECONDS
 from visualizer.popup_widgets.popup_base import PopupBase
 
 COLOR_MAPS = [
     'thermal', 'flame', 'yellowy', 'bipolar', 'spectrum', 'cyclic', 'greyclip', 'grey', 'viridis', 'inferno', 'plasma', 'magma', 'turbo'
 ]
 
+FFT_SIZES = [256, 512, 1024, 2048, 4096, 8192]
+
+HOP_SIZES = [32, 64, 128, 256, 512, 1024, 2048]
+
 BRIGHT_PENS = [
     ('Cyan', 'c'),
     ('Magenta', 'm'),
@@ -20,11 +26,12 @@ class DisplayControlsPopup(PopupBase):
     def __init__(
         self,
         parent,
-        gui
+        message_bus=None
     ):
-        super().__init__(parent, message_bus=None)
+        super().__init__(parent, message_bus=message_bus)
         self.setWindowTitle("Display Controls")
-        self.gui = gui
+        # Opened from the control panel, whose state is the VisualizerGUI
+        self.gui = parent.state
         self.waveform_graph = self.gui.vis_layout.waveform_graph
         self.spectrogram_graph = self.gui.vis_layout.spectrogram_graph
         
@@ -54,6 +61,34 @@ class DisplayControlsPopup(PopupBase):
         self.layout.insertWidget(self.layout.count() - 2, self.spectrogram_cmap_label)
         self.layout.insertWidget(self.layout.count() - 2, self.spectrogram_cmap_dropdown)
 
+        # Spectrogram Frequency Scale Dropdown
+        self.frequency_scale_label = QtWidgets.QLabel("Spectrogram Frequency Scale:")
+        self.frequency_scale_dropdown = QtWidgets.QComboBox()
+        self.frequency_scale_dropdown.addItems(FREQUENCY_SCALES.keys())
+        for name, scale in FREQUENCY_SCALES.items():
+            if type(self.spectrogram_graph.scale) is scale:
+                self.frequency_scale_dropdown.setCurrentText(name)
+        self.frequency_scale_dropdown.currentTextChanged.connect(self.on_frequency_scale_changed)
+        self.layout.insertWidget(self.layout.count() - 2, self.frequency_scale_label)
+        self.layout.insertWidget(self.layout.count() - 2, self.frequency_scale_dropdown)
+
+        # Spectrogram FFT Size and Hop Dropdowns
+        self.fft_size_label = QtWidgets.QLabel("Spectrogram FFT Size:")
+        self.fft_size_dropdown = QtWidgets.QComboBox()
+        self.fft_size_dropdown.addItems([str(n) for n in FFT_SIZES])
+        self.fft_size_dropdown.setCurrentText(str(self.spectrogram_graph.spec_nfft))
+        self.fft_size_dropdown.currentTextChanged.connect(self.on_fft_changed)
+        self.layout.insertWidget(self.layout.count() - 2, self.fft_size_label)
+        self.layout.insertWidget(self.layout.count() - 2, self.fft_size_dropdown)
+
+        self.hop_label = QtWidgets.QLabel("Spectrogram Hop:")
+        self.hop_dropdown = QtWidgets.QComboBox()
+        self.hop_dropdown.addItems([str(n) for n in HOP_SIZES])
+        self.hop_dropdown.setCurrentText(str(self.spectrogram_graph.spec_hop))
+        self.hop_dropdown.currentTextChanged.connect(self.on_fft_changed)
+        self.layout.insertWidget(self.layout.count() - 2, self.hop_label)
+        self.layout.insertWidget(self.layout.count() - 2, self.hop_dropdown)
+
         # Waveform Pen Color Dropdown
         self.waveform_pen_label = QtWidgets.QLabel("Waveform Color:")
         self.waveform_pen_dropdown = QtWidgets.QComboBox()
@@ -70,7 +105,7 @@ class DisplayControlsPopup(PopupBase):
         # Window duration Slider
         self.duration_control = NumericControl(
             min_value=0.01,
-            max_value=10.0,
+            max_value=MAX_WINDOW_SECONDS,
             decimals=2,
             initial_value=5.0,
             slider_steps=100,
@@ -79,6 +114,19 @@ class DisplayControlsPopup(PopupBase):
         )
         self.layout.insertWidget(self.layout.count() - 2, QtWidgets.QLabel(self, text="Window Duration"))
         self.layout.insertWidget(self.layout.count() - 2, self.duration_control)
+
+        # Redraw rate Slider
+        self.fps_control = NumericControl(
+            min_value=1,
+            max_value=120,
+            decimals=0,
+            initial_value=self.gui.target_fps,
+            slider_steps=1,
+            slider_change_func=self.gui.set_target_fps,
+            input_change_func=self.gui.set_target_fps
+        )
+        self.layout.insertWidget(self.layout.count() - 2, QtWidgets.QLabel(self, text="Target Frame Rate (fps)"))
+        self.layout.insertWidget(self.layout.count() - 2, self.fps_control)
         
     def on_y_mode_toggle(self) -> None:
         """
@@ -104,6 +152,21 @@ class DisplayControlsPopup(PopupBase):
         text = "Show Area Under Curve" if not checked else "Hide Area Under Curve"
         self.area_button.setText(text)
 
+    def on_frequency_scale_changed(self, name: str) -> None:
+        """
+        Change the spectrogram frequency scale.
+        """
+        self.spectrogram_graph.set_scale(FREQUENCY_SCALES[name]())
+
+    def on_fft_changed(self) -> None:
+        """
+        Apply the selected FFT size and hop to the spectrogram analysis.
+        """
+        nfft = int(self.fft_size_dropdown.currentText())
+        # Hops longer than the frame would skip audio entirely
+        hop = min(int(self.hop_dropdown.currentText()), nfft)
+        self.spectrogram_graph.set_fft(nfft, hop)
+
     def on_waveform_pen_changed(self, idx: int) -> None:
         """
         Change the waveform plot pen color.
@@ -0,0 +1,79 @@
+from pyqtgraph.Qt import QtWidgets
+from visualizer.common_widgets.numeric_control import NumericControl
+from message_bus import MessageBus, FreeverbSettingsMessage
+from visualizer.popup_widgets.popup_base import PopupBase
+
+class FreeverbPopup(PopupBase):
+    def __init__(self, parent, message_bus: MessageBus):
+        super().__init__(parent, message_bus)
+        self.setWindowTitle("Freeverb Settings")
+
+        # Room size
+        self.room_size_control = NumericControl(
+            min_value=0.0,
+            max_value=1.0,
+            decimals=2,
+            initial_value=0.5,
+            slider_steps=100,
+            slider_change_func=self.freeverb_event,
+            input_change_func=self.freeverb_event
+        )
+        self.layout.insertWidget(self.layout.count() - 2, QtWidgets.QLabel(self, text="Room Size"))
+        self.layout.insertWidget(self.layout.count() - 2, self.room_size_control)
+
+        # Damping
+        self.damping_control = NumericControl(
+            min_value=0.0,
+            max_value=1.0,
+            decimals=2,
+            initial_value=0.5,
+            slider_steps=100,
+            slider_change_func=self.freeverb_event,
+            input_change_func=self.freeverb_event
+        )
+        self.layout.insertWidget(self.layout.count() - 2, QtWidgets.QLabel(self, text="Damping"))
+        self.layout.insertWidget(self.layout.count() - 2, self.damping_control)
+
+        # Wet level
+        self.wet_control = NumericControl(
+            min_value=0.0,
+            max_value=1.0,
+            decimals=2,
+            initial_value=0.3,
+            slider_steps=100,
+            slider_change_func=self.freeverb_event,
+            input_change_func=self.freeverb_event
+        )
+        self.layout.insertWidget(self.layout.count() - 2, QtWidgets.QLabel(self, text="Wet Level"))
+        self.layout.insertWidget(self.layout.count() - 2, self.wet_control)
+
+        # Freeverb toggle button
+        self.toggle_button = QtWidgets.QPushButton("Enable Freeverb")
+        self.toggle_button.setCheckable(True)
+        self.toggle_button.toggled.connect(self.freeverb_event)
+        self.layout.insertWidget(self.layout.count() - 2, self.toggle_button)
+
+        # Allow Clipping toggle button
+        self.allow_clipping_button = QtWidgets.QPushButton("Allow Clipping")
+        self.allow_clipping_button.setCheckable(True)
+        self.allow_clipping_button.setChecked(True)
+        self.allow_clipping_button.toggled.connect(self.freeverb_event)
+        self.layout.insertWidget(self.layout.count() - 2, self.allow_clipping_button)
+
+    def freeverb_event(self, _e=None):
+        enabled = self.toggle_button.isChecked()
+        room_size = self.room_size_control.get_value()
+        damping = self.damping_control.get_value()
+        wet = self.wet_control.get_value()
+        allow_clipping = self.allow_clipping_button.isChecked()
+        message = FreeverbSettingsMessage(enabled, room_size, damping, wet, allow_clipping)
+        if enabled:
+            self.toggle_button.setText("Disable Freeverb")
+        else:
+            self.toggle_button.setText("Enable Freeverb")
+        if allow_clipping:
+            self.allow_clipping_button.setText("Disallow Clipping")
+        else:
+            self.allow_clipping_button.setText("Allow Clipping")
+        if self.message_bus:
+            self.message_bus.send(message)
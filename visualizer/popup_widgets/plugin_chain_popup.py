@@ -0,0 +1,32 @@
+from pyqtgraph.Qt import QtCore, QtWidgets
+from message_bus import CHAIN_PLUGINS, MessageBus, PluginChainMessage
+from visualizer.popup_widgets.popup_base import PopupBase
+
+class PluginChainPopup(PopupBase):
+    def __init__(self, parent, message_bus: MessageBus):
+        super().__init__(parent, message_bus)
+        self.setWindowTitle("Plugin Chain")
+
+        # Drag to reorder stages, uncheck to remove a stage from the chain
+        self.chain_list = QtWidgets.QListWidget()
+        self.chain_list.setDragDropMode(QtWidgets.QAbstractItemView.InternalMove)
+        for key, name in CHAIN_PLUGINS.items():
+            item = QtWidgets.QListWidgetItem(name)
+            item.setData(QtCore.Qt.UserRole, key)
+            item.setFlags(item.flags() | QtCore.Qt.ItemIsUserCheckable)
+            item.setCheckState(QtCore.Qt.Checked)
+            self.chain_list.addItem(item)
+        self.chain_list.itemChanged.connect(self.chain_event)
+        self.chain_list.model().rowsMoved.connect(self.chain_event)
+        self.layout.insertWidget(self.layout.count() - 2, QtWidgets.QLabel(self, text="Processing Order"))
+        self.layout.insertWidget(self.layout.count() - 2, self.chain_list)
+
+    def chain_event(self, *_e):
+        order = []
+        for row in range(self.chain_list.count()):
+            item = self.chain_list.item(row)
+            if item.checkState() == QtCore.Qt.Checked:
+                order.append(item.data(QtCore.Qt.UserRole))
+        message = PluginChainMessage(order)
+        if self.message_bus:
+            self.message_bus.send(message)
@@ -1,11 +1,16 @@
-from multiprocessing import Event, Process, Queue
+from multiprocessing import Event, Process
 from typing import Any, Optional, Tuple
 from pyqtgraph.Qt import QtWidgets  
 
 from message_bus import MessageBus
 import message_bus
+from dsp_profiler import DSPProfiler
+from shared_ring import SharedAudioRing
 from visualizer.visualizer_gui import VisualizerGUI
 
+# Seconds of audio the waveform ring holds before unread samples are overwritten
+WAVEFORM_RING_SECONDS = 2.0
+
 class VisualizerApp:
     """
     Application class for running the audio visualizer GUI.
@@ -14,9 +19,10 @@ class VisualizerApp:
         self,
         sr: int,
         stop_event: Any,
-        waveform_queue: Queue,
+        waveform_ring: SharedAudioRing,
         audio_stop_event: Optional[Any] = None,
-        message_bus: message_bus = None
+        message_bus: message_bus = None,
+        profiler: Optional[DSPProfiler] = None
     ) -> None:
         """
         Initialize the VisualizerApp.
@@ -24,12 +30,13 @@ class VisualizerApp:
         Parameters:
             sr (int): Sample rate.
             stop_event (Any): Event to signal visualizer shutdown.
-            waveform_queue (Queue): Queue for waveform data.
+            waveform_ring (SharedAudioRing): Shared ring carrying the waveform.
             audio_stop_event (Optional[Any]): Event to signal audio shutdown.
+            profiler (Optional[DSPProfiler]): Audio profiler shown live, if enabled.
         """
         self.app = QtWidgets.QApplication([])
         self.load_global_styles()
-        self.widget = VisualizerGUI(sr, stop_event, waveform_queue, audio_stop_event, message_bus=message_bus)
+        self.widget = VisualizerGUI(sr, stop_event, waveform_ring, audio_stop_event, message_bus=message_bus, profiler=profiler)
         self.widget.setWindowTitle("Live Audio Visualizer")
         self.widget.show()
         self.widget.raise_()  # Bring window to front
@@ -52,10 +59,11 @@ class VisualizerApp:
 def visualizer_process_with_ready(
     sr: int,
     stop_event: Any,
-    waveform_queue: Queue,
+    waveform_ring: SharedAudioRing,
     audio_stop_event: Optional[Any],
     window_ready: Any,
-    message_bus: MessageBus
+    message_bus: MessageBus,
+    profiler: Optional[DSPProfiler] = None
 ) -> None:
     """
     Run the visualizer process and signal when the window is ready.
@@ -63,11 +71,12 @@ def visualizer_process_with_ready(
     Parameters:
         sr (int): Sample rate.
         stop_event (Any): Event to signal visualizer shutdown.
-        waveform_queue (Queue): Queue for waveform data.
+        waveform_ring (SharedAudioRing): Shared ring carrying the waveform.
         audio_stop_event (Optional[Any]): Event to signal audio shutdown.
         window_ready (Any): Event to signal when the window is ready.
+        profiler (Optional[DSPProfiler]): Audio profiler shown live, if enabled.
     """
-    app = VisualizerApp(sr, stop_event, waveform_queue, audio_stop_event, message_bus)
+    app = VisualizerApp(sr, stop_event, waveform_ring, audio_stop_event, message_bus, profiler)
     app.widget.show()
     app.widget.raise_()
     app.widget.activateWindow()
@@ -77,36 +86,43 @@ def visualizer_process_with_ready(
 def start_visualizer_process(
     sr: int,
     stop_event: Optional[Any] = None,
-    waveform_queue: Optional[Queue] = None,
+    waveform_ring: Optional[SharedAudioRing] = None,
     audio_stop_event: Optional[Any] = None,
-    message_bus: MessageBus = None
-) -> Tuple[Process, Queue]:
+    message_bus: MessageBus = None,
+    profiler: Optional[DSPProfiler] = None,
+    max_block: int = 4096
+) -> Tuple[Process, SharedAudioRing]:
     """
     Start the visualizer process in a separate process.
 
     Parameters:
         sr (int): Sample rate.
         stop_event (Optional[Any]): Event to signal visualizer shutdown.
-        waveform_queue (Optional[Queue]): Queue for waveform data.
+        waveform_ring (Optional[SharedAudioRing]): Shared ring carrying the waveform.
+            Created for the sample rate if None.
         audio_stop_event (Optional[Any]): Event to signal audio shutdown.
+        profiler (Optional[DSPProfiler]): Audio profiler shown live, if enabled.
+        max_block (int): Largest block the audio thread writes to a new ring, in frames.
 
     Returns:
-        Tuple[Process, Queue]: The process and waveform queue.
+        Tuple[Process, SharedAudioRing]: The process and waveform ring.
     """
     if stop_event is None:
         stop_event = Event()
-    if waveform_queue is None:
-        waveform_queue = Queue()
+    if waveform_ring is None:
+        # Room for several blocks even when large blocks are requested
+        capacity = max(int(sr * WAVEFORM_RING_SECONDS), 4 * max_block)
+        waveform_ring = SharedAudioRing(capacity, max_block)
 
     from multiprocessing import Event as MpEvent
     window_ready = MpEvent()
 
     p = Process(
         target=visualizer_process_with_ready,
-        args=(sr, stop_event, waveform_queue, audio_stop_event, window_ready, message_bus)
+        args=(sr, stop_event, waveform_ring, audio_stop_event, window_ready, message_bus, profiler)
     )
     p.start()
 
     # Wait for the window to be shown (or timeout)
     window_ready.wait(timeout=5)
-    return p, waveform_queue
+    return p, waveform_ring
@@ -1,14 +1,26 @@
+import time
+
 import numpy as np
-import queue
 from typing import Any, Optional
 
 from pyqtgraph.Qt import QtCore, QtWidgets  
 from message_bus import MessageBus
+from dsp_profiler import DSPProfiler
+from shared_ring import SharedAudioRing
 from visualizer.layout import VisualizerLayout
 from visualizer.graphing_widgets.spectrogram_graph import SpectrogramGraph
 from visualizer.graphing_widgets.waveform_graph import WaveformGraph
+from visualizer.graphing_widgets.sample_history import SampleHistory, amplitude_to_db
 from visualizer.common_widgets.numeric_control import NumericControl
 
+# Samples copied from the waveform ring per read while draining it
+READ_CHUNK_SAMPLES = 4096
+DEFAULT_TARGET_FPS = 60.0
+# Smoothing of the displayed lag so the label stays readable
+LATENCY_SMOOTHING = 0.1
+# How often the DSP profiler summary is refreshed
+PROFILE_INTERVAL_MS = 500
+
 class VisualizerGUI(QtWidgets.QWidget):
     """
     Main widget for the audio visualizer, containing waveform and spectrogram views and controls.
@@ -17,10 +29,11 @@ class VisualizerGUI(QtWidgets.QWidget):
         self,
         samplerate: int,
         stop_event: Any,
-        waveform_queue: Any,
+        waveform_ring: SharedAudioRing,
         audio_stop_event: Optional[Any] = None,
         parent: Optional[Any] = None,
-        message_bus: MessageBus = None
+        message_bus: MessageBus = None,
+        profiler: Optional[DSPProfiler] = None
     ) -> None:
         """
         Initialize the main visualizer GUI widget.
@@ -28,16 +41,19 @@ class VisualizerGUI(QtWidgets.QWidget):
         Parameters:
             samplerate (int): The audio sample rate.
             stop_event (Any): Event to signal visualizer shutdown.
-            waveform_queue (Any): Queue for passing waveform data.
+            waveform_ring (SharedAudioRing): Shared ring the audio thread writes the waveform to.
             audio_stop_event (Optional[Any]): Event to signal audio shutdown.
             parent (Optional[Any]): The parent widget.
+            profiler (Optional[DSPProfiler]): Audio profiler whose load is shown, if enabled.
         """
         super().__init__(parent)
         self.setObjectName("GUI")
         self.samplerate = samplerate
         self.stop_event = stop_event
         self.audio_stop_event = audio_stop_event
-        self.waveform_queue = waveform_queue
+        self.waveform_ring = waveform_ring
+        self.read_buffer = np.zeros(READ_CHUNK_SAMPLES, dtype=np.float32)
+        self.db_buffer = np.zeros(READ_CHUNK_SAMPLES, dtype=np.float32)
 
         self.setWindowFlags(QtCore.Qt.FramelessWindowHint)
         
@@ -45,18 +61,34 @@ class VisualizerGUI(QtWidgets.QWidget):
         self.setLayout(QtWidgets.QHBoxLayout())
         self.layout().addWidget(self.vis_layout)
 
+        self.vis_layout.waveform_graph.configure(self.samplerate)
+        self.vis_layout.spectrogram_graph.configure(self.samplerate)
+
         self.buffer_seconds = 0.5
-        self.plot_buffer = np.zeros(int(self.samplerate * self.buffer_seconds), dtype=np.float32)
+        # Displayed waveform history, one window long
+        self.history = SampleHistory(int(self.samplerate * self.buffer_seconds))
+
+        # Samples skipped because they were too old to ever be drawn
+        self.skipped_samples = 0
+        self.display_latency = 0.0
 
         # Timers
+        self.target_fps = DEFAULT_TARGET_FPS
         self.timer = QtCore.QTimer()
+        self.timer.setTimerType(QtCore.Qt.PreciseTimer)
         self.timer.timeout.connect(self.update)
-        self.timer.start(10)
+        self.timer.start(int(round(1000 / self.target_fps)))
 
         self.stop_timer = QtCore.QTimer()
         self.stop_timer.timeout.connect(self.check_stop)
         self.stop_timer.start(100)
 
+        self.profiler = profiler
+        if self.profiler is not None:
+            self.profile_timer = QtCore.QTimer()
+            self.profile_timer.timeout.connect(self.update_profile)
+            self.profile_timer.start(PROFILE_INTERVAL_MS)
+
     def update_buffer_size(self, new_seconds: float) -> None:
         """
         Change the buffer size for waveform and spectrogram displays.
@@ -65,31 +97,79 @@ class VisualizerGUI(QtWidgets.QWidget):
             new_seconds (float): The new buffer duration in seconds.
         """
         self.buffer_seconds = new_seconds
-        self.plot_buffer = np.zeros(int(self.samplerate * self.buffer_seconds), dtype=np.float32)
+        self.history.resize(int(self.samplerate * self.buffer_seconds))
         self.vis_layout.waveform_graph.set_xrange(0, self.buffer_seconds)
         self.vis_layout.spectrogram_graph.spectrogram_plot.setXRange(0, self.buffer_seconds, padding=0)
 
+    def set_target_fps(self, fps: float) -> None:
+        """
+        Change how often the displays are redrawn.
+
+        Parameters:
+            fps (float): Target frames per second.
+        """
+        self.target_fps = max(1.0, fps)
+        self.timer.setInterval(int(round(1000 / self.target_fps)))
+
+    def push_samples(self, chunk: np.ndarray) -> None:
+        """
+        Add new samples, linear and in dB, to the waveform history and the
+        waveform graph's decimation pyramids.
+
+        Parameters:
+            chunk (np.ndarray): The new samples.
+        """
+        if self.db_buffer.shape[0] < chunk.shape[0]:
+            self.db_buffer = np.zeros(chunk.shape[0], dtype=np.float32)
+        # Converted once here, the dB display reads the cached values
+        db_chunk = amplitude_to_db(chunk, self.db_buffer)
+        self.history.push(chunk, db_chunk)
+        self.vis_layout.waveform_graph.push(chunk, db_chunk)
+
     def update(self) -> None:
         """
-        Refresh the waveform and spectrogram displays with new data.
+        Drain everything pending in the waveform ring into the waveform buffer
+        and the spectral analysis worker, then redraw each display once.
         """
+        spectrogram = self.vis_layout.spectrogram_graph
+        # When behind, samples older than either display can show are skipped unread
+        stale = self.waveform_ring.available() - max(self.history.capacity, spectrogram.history_samples())
+        if stale > 0:
+            self.waveform_ring.discard(stale)
+            self.skipped_samples += stale
+
         updated = False
-        chunk = None
-        try:
-            chunk = self.waveform_queue.get_nowait()
-            if chunk.size != 0:
-                n = len(chunk)
-                if n > len(self.plot_buffer):
-                    chunk = chunk[-len(self.plot_buffer):]
-                    n = len(chunk)
-                self.plot_buffer[:-n] = self.plot_buffer[n:]
-                self.plot_buffer[-n:] = chunk
-                updated = True
-        except queue.Empty:
-            pass
+        while True:
+            n = self.waveform_ring.read_into(self.read_buffer)
+            if n == 0:
+                break
+            chunk = self.read_buffer[:n]
+            self.push_samples(chunk)
+            spectrogram.add_audio(chunk)
+            updated = True
+
         if updated:
-            self.vis_layout.waveform_graph.update( self.buffer_seconds, self.plot_buffer)
-            self.vis_layout.spectrogram_graph.update(chunk, self.buffer_seconds, self.samplerate)
+            self.vis_layout.waveform_graph.update(self.buffer_seconds, self.history)
+            self.update_latency()
+        # Analysis finishes on the worker thread, pick up its columns whenever they land
+        spectrogram.render(self.buffer_seconds, self.samplerate)
+
+    def update_latency(self) -> None:
+        """
+        Measure how far the drawn waveform lags the audio thread and show it.
+        """
+        write_ns, write_cursor = self.waveform_ring.last_write()
+        # Time since the newest write plus whatever arrived after the last read
+        unread = write_cursor - self.waveform_ring.read_cursor
+        latency = (time.perf_counter_ns() - write_ns) / 1e9 + unread / self.samplerate
+        self.display_latency += LATENCY_SMOOTHING * (latency - self.display_latency)
+        self.vis_layout.control_panel.set_latency(self.display_latency)
+
+    def update_profile(self) -> None:
+        """
+        Show the audio thread's current DSP load.
+        """
+        self.vis_layout.control_panel.set_dsp_load(self.profiler.load_line())
 
     def check_stop(self) -> None:
         """
@@ -103,6 +183,7 @@ class VisualizerGUI(QtWidgets.QWidget):
         Handle the exit button or window close event by signaling shutdown.
         """
         self.stop_event.set()
+        self.vis_layout.spectrogram_graph.stop()
         if self.audio_stop_event is not None:
             self.audio_stop_event.set()
         QtCore.QCoreApplication.quit()